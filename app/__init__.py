@@ -2,12 +2,25 @@ from flask import Flask, request
 from werkzeug.exceptions import HTTPException, InternalServerError, MethodNotAllowed
 
 from .api.api_response import json_response
+from .api.conditional import init_conditional
 from .auth import _init_auth0
+from .cli import init_cli
+from .compression import init_compression
+from .file_serving import init_file_serving
+from .data.db import init_db
+from .json_provider import FastJSONProvider
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
 
     _init_auth0(app)
+    init_db(app)
+    # after_request hooks run in reverse order: compression goes last.
+    init_compression(app)
+    init_conditional(app)
+    init_file_serving(app)
+    init_cli(app)
 
     from .routes import main
     app.register_blueprint(main)
@@ -1,12 +1,49 @@
 from http import HTTPStatus
 
-from flask import jsonify
+from flask import jsonify, request
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
 
+from ..data.jsonld import JSONLD_CONTEXT, get_jsonld_mode, jsonld_link_header
 
-def json_response(status_code, message, response=None):
+JSONLD_MIMETYPE = "application/ld+json"
+
+
+def envelope(status_code, message, response=None):
     try:
         status_text = HTTPStatus(status_code).phrase
     except ValueError:
         status_text = "Unknown"
-    payload = {"status": status_text, "message": message, "response": response}
-    return jsonify(payload), status_code
+    return {"status": status_text, "message": message, "response": response}
+
+
+# True when the client prefers application/ld+json over application/json.
+def wants_jsonld(accept_header):
+    accept = parse_accept_header(accept_header, MIMEAccept)
+    return accept.best_match(["application/json", JSONLD_MIMETYPE]) == JSONLD_MIMETYPE
+
+
+# Body and headers of a JSON-LD aware response. In shared context mode the
+# context goes to the top of an application/ld+json document, or into a Link
+# header for plain JSON.
+def negotiate_jsonld(payload, jsonld):
+    headers = {"Vary": "Accept"}
+    if jsonld:
+        headers["Content-Type"] = JSONLD_MIMETYPE
+        if get_jsonld_mode() == "shared":
+            payload = {"@context": JSONLD_CONTEXT, **payload}
+    elif get_jsonld_mode() == "shared":
+        headers["Link"] = jsonld_link_header()
+    return payload, headers
+
+
+def jsonld_response(payload, status_code=200):
+    payload, headers = negotiate_jsonld(payload, wants_jsonld(request.headers.get("Accept")))
+    response = jsonify(payload)
+    response.status_code = status_code
+    response.headers.update(headers)
+    return response
+
+
+def json_response(status_code, message, response=None):
+    return jsonld_response(envelope(status_code, message, response), status_code)
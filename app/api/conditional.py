@@ -0,0 +1,83 @@
+from functools import wraps
+from hashlib import sha1
+from os import environ as env
+
+from flask import make_response, request
+
+from ..data.changes import current_version, last_changed_at
+from ..data.jsonld import get_jsonld_mode, jsonld_link_header
+from .api_response import wants_jsonld
+
+
+def cache_max_age():
+    return int(env.get("API_CACHE_MAX_AGE", 0))
+
+
+def _set_cache_control(response):
+    max_age = cache_max_age()
+    response.cache_control.public = True
+    if max_age > 0:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+
+
+# Strong validator for the current dataset version, the exact request URL
+# (path plus "?" and query string, as Flask's full_path) and the negotiated
+# representation (JSON-LD or plain JSON). The version carries its scope
+# (database, shared or process tag), so ETags only match where the version
+# counter is the same.
+def dataset_etag(full_path=None, jsonld=None):
+    if full_path is None:
+        full_path = request.full_path
+    if jsonld is None:
+        jsonld = wants_jsonld(request.headers.get("Accept"))
+    raw = f"{current_version()}:{full_path}"
+    if jsonld:
+        raw += ":jsonld"
+    return sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since is not None:
+        return int(last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+# Answer If-None-Match / If-Modified-Since with 304 before running the view.
+def conditional_get(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        etag = dataset_etag()
+        last_modified = last_changed_at()
+        if _not_modified(etag, last_modified):
+            response = make_response("", 304)
+        else:
+            response = make_response(func(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.vary.add("Accept")
+        _set_cache_control(response)
+        return response
+
+    return wrapper
+
+
+def _snapshot_cache_headers(response):
+    if (
+        request.endpoint == "static"
+        and (request.view_args or {}).get("filename", "").startswith("data/")
+        and response.status_code in (200, 206, 304)
+    ):
+        _set_cache_control(response)
+        if request.view_args["filename"].endswith(".json") and get_jsonld_mode() == "shared":
+            response.headers["Link"] = jsonld_link_header()
+    return response
+
+
+def init_conditional(app):
+    app.after_request(_snapshot_cache_headers)
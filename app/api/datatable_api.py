@@ -1,46 +1,71 @@
-from flask import Response, jsonify, request
+from itertools import chain
+from os import environ as env
+
+from flask import Response, request
 
 from ..blueprint import main
-from ..data.db import conn, fetch_count, fetch_rows_with_cols
-from ..data.jsonld import add_jsonld_list
+from .api_response import jsonld_response
+from ..data.cache import cached_result
+from ..data.db import fetch_count, fetch_rows_with_cols, get_conn, pooled_connection
+from ..data.jsonld import add_jsonld_list, get_jsonld_mode, jsonld_link_header
+from ..data.prepared import compile_sql, execute_prepared
+from ..data.search import build_global_search_clause, get_diacritics_mode
 from ..data.snapshots import (
-    build_csv_payload,
-    build_grouped_json_payload,
-    fetch_zdenci_data,
+    iter_csv_payload,
+    iter_grouped_json_payload,
+    iter_zdenci_data,
 )
 from ..data.zdenci_constants import (
     BASE_FROM,
     COLUMN_SQL,
     DATA_KEYS,
     NUMERIC_KEYS,
-    SEARCH_COLUMNS,
     SELECT_COLUMNS,
 )
 
-
-# Build WHERE clause and params for global and column filters
-def _build_search_clause(search_value, column_filters):
-    clauses = []
-    params = []
-
-    if search_value:
-        like = f"%{search_value}%"
-        global_clauses = [
-            f"LOWER(CAST({col} AS TEXT)) LIKE %s" for col in SEARCH_COLUMNS
-        ]
-        clauses.append("(" + " OR ".join(global_clauses) + ")")
-        params.extend([like] * len(global_clauses))
-
+COUNT_MODES = {"exact", "estimated"}
+TOTAL_COUNT_TTL = float(env.get("DATATABLE_COUNT_TTL", 60))
+ESTIMATED_COUNT_SQL = "SELECT reltuples::bigint FROM pg_class WHERE oid = 'zdenac'::regclass"
+EXACT_COUNT_SQL = "SELECT COUNT(*) FROM zdenac"
+NUMERIC_OPERATORS = {
+    "equal": "=",
+    "notEqual": "<>",
+    "greater": ">",
+    "greaterOrEqual": ">=",
+    "less": "<",
+    "lessOrEqual": "<=",
+}
+TEXT_OPERATORS = {
+    "equal": "=",
+    "notEqual": "<>",
+    "starts": "LIKE",
+    "ends": "LIKE",
+    "contains": "LIKE",
+    "notContains": "NOT LIKE",
+}
+
+
+# Build WHERE clause and params for global and column filters. The clause text
+# depends only on the filter shape and is compiled once per shape.
+def _build_search_clause(search_value, column_filters, diacritics="strict"):
+    search_clause, params = build_global_search_clause(search_value, diacritics)
+    column_shapes = []
     for column_filter in column_filters:
-        clause, clause_params = _build_column_clause(column_filter)
-        if clause:
-            clauses.append(clause)
+        shape, clause_params = _compile_column_filter(column_filter)
+        if shape:
+            column_shapes.append(shape)
             params.extend(clause_params)
 
-    if clauses:
-        return " WHERE " + " AND ".join(clauses), params
+    shape = ("datatable_where", search_clause, tuple(column_shapes))
+    return compile_sql(shape, lambda: _where_sql(search_clause, column_shapes)), params
+
 
-    return "", []
+def _where_sql(search_clause, column_shapes):
+    clauses = [search_clause] if search_clause else []
+    clauses.extend(_column_clause_sql(key, op) for key, op in column_shapes)
+    if clauses:
+        return " WHERE " + " AND ".join(clauses)
+    return ""
 
 
 # Map DataTables ordering to SQL ORDER BY
@@ -58,18 +83,17 @@ def _get_order_clause(order_index, order_dir, default_clause):
 
 
 # Read column-level filters from request parameters
-def _get_column_filters():
+def _get_column_filters(args):
     filters = []
     for idx, key in enumerate(DATA_KEYS):
-        col_sql = COLUMN_SQL[key]
-        value = request.args.get(f"columns[{idx}][search][value]", "").strip()
-        cc_value = request.args.get(
+        value = args.get(f"columns[{idx}][search][value]", "").strip()
+        cc_value = args.get(
             f"columns[{idx}][columnControl][search][value]", ""
         ).strip()
-        cc_logic = request.args.get(
+        cc_logic = args.get(
             f"columns[{idx}][columnControl][search][logic]", ""
         ).strip()
-        cc_type = request.args.get(
+        cc_type = args.get(
             f"columns[{idx}][columnControl][search][type]", ""
         ).strip()
 
@@ -78,7 +102,6 @@ def _get_column_filters():
                 filters.append(
                     {
                         "key": key,
-                        "col_sql": col_sql,
                         "logic": cc_logic,
                         "value": cc_value,
                         "type": cc_type or "text",
@@ -90,7 +113,6 @@ def _get_column_filters():
             filters.append(
                 {
                     "key": key,
-                    "col_sql": col_sql,
                     "logic": "contains",
                     "value": value,
                     "type": "text",
@@ -99,103 +121,157 @@ def _get_column_filters():
     return filters
 
 
-# Convert a single column filter to SQL and params
-def _build_column_clause(column_filter):
-    col_sql = column_filter["col_sql"]
+# Reduce a column filter to its shape (key, operator) and params; None when
+# the filter does not apply.
+def _compile_column_filter(column_filter):
+    key = column_filter["key"]
     logic = (column_filter.get("logic") or "contains").strip()
     value = (column_filter.get("value") or "").strip()
     filter_type = (column_filter.get("type") or "text").strip().lower()
-    col_expr = f"LOWER(CAST({col_sql} AS TEXT))"
 
-    if logic == "empty":
-        return f"({col_sql} IS NULL OR TRIM(CAST({col_sql} AS TEXT)) = '')", []
-    if logic == "notEmpty":
-        return f"({col_sql} IS NOT NULL AND TRIM(CAST({col_sql} AS TEXT)) <> '')", []
+    if logic in {"empty", "notEmpty"}:
+        return (key, logic), []
     if not value:
         return None, []
 
     value = value.lower()
 
-    if (
-        filter_type == "num"
-        and column_filter.get("key") in NUMERIC_KEYS
-        and logic in {"equal", "notEqual", "greater", "greaterOrEqual", "less", "lessOrEqual"}
-    ):
+    if filter_type == "num" and key in NUMERIC_KEYS and logic in NUMERIC_OPERATORS:
         try:
             numeric_value = float(value)
         except ValueError:
             return None, []
+        return (key, f"num:{logic}"), [numeric_value]
 
-        op_map = {
-            "equal": "=",
-            "notEqual": "<>",
-            "greater": ">",
-            "greaterOrEqual": ">=",
-            "less": "<",
-            "lessOrEqual": "<=",
-        }
-        return f"CAST({col_sql} AS NUMERIC) {op_map[logic]} %s", [numeric_value]
-
-    if logic == "equal":
-        return f"{col_expr} = %s", [value]
-    if logic == "notEqual":
-        return f"{col_expr} <> %s", [value]
+    if logic in {"equal", "notEqual"}:
+        return (key, logic), [value]
     if logic == "starts":
-        return f"{col_expr} LIKE %s", [f"{value}%"]
+        return (key, logic), [f"{value}%"]
     if logic == "ends":
-        return f"{col_expr} LIKE %s", [f"%{value}"]
+        return (key, logic), [f"%{value}"]
     if logic == "notContains":
-        return f"{col_expr} NOT LIKE %s", [f"%{value}%"]
-
-    return f"{col_expr} LIKE %s", [f"%{value}%"]
-
-
-@main.route("/api/zdenci")
-def api_zdenci():
-    draw = request.args.get("draw", 0, type=int)
-    start = request.args.get("start", 0, type=int)
-    length = request.args.get("length", 50, type=int)
-    search_value = request.args.get("search[value]", "", type=str).strip().lower()
-    column_filters = _get_column_filters()
-
-    where_clause, params = _build_search_clause(search_value, column_filters)
-    order_index = request.args.get("order[0][column]", type=int)
-    order_dir = request.args.get("order[0][dir]", "asc")
+        return (key, logic), [f"%{value}%"]
+    return (key, "contains"), [f"%{value}%"]
+
+
+# Convert a column filter shape to SQL
+def _column_clause_sql(key, op):
+    col_sql = COLUMN_SQL[key]
+    if op == "empty":
+        return f"({col_sql} IS NULL OR TRIM(CAST({col_sql} AS TEXT)) = '')"
+    if op == "notEmpty":
+        return f"({col_sql} IS NOT NULL AND TRIM(CAST({col_sql} AS TEXT)) <> '')"
+    if op.startswith("num:"):
+        return f"CAST({col_sql} AS NUMERIC) {NUMERIC_OPERATORS[op[4:]]} %s"
+    return f"LOWER(CAST({col_sql} AS TEXT)) {TEXT_OPERATORS[op]} %s"
+
+
+def _get_count_mode(args):
+    mode = args.get("count", "", type=str).strip().lower()
+    if mode not in COUNT_MODES:
+        mode = env.get("DATATABLE_COUNT_MODE", "exact").strip().lower()
+    return mode if mode in COUNT_MODES else "exact"
+
+
+# Planner row estimate; -1 until the table has been analyzed.
+def usable_estimate(estimate):
+    return estimate if estimate is not None and estimate >= 0 else None
+
+
+# Unfiltered total, cached until the next write or the TTL runs out.
+def _get_total_count(cur, mode):
+    def load():
+        total_count = None
+        if mode == "estimated":
+            cur.execute(ESTIMATED_COUNT_SQL)
+            total_count = usable_estimate(fetch_count(cur))
+        if total_count is None:
+            cur.execute(EXACT_COUNT_SQL)
+            total_count = fetch_count(cur)
+        return total_count
+
+    return cached_result("datatable_total", {"mode": mode}, load, ttl=TOTAL_COUNT_TTL)
+
+
+# Query plan for a DataTables request: SQL text and parameters of the page
+# query and of the fallback filtered count. The Flask view and the ASGI view
+# (app/asgi) execute the same plan.
+def plan_datatable(args):
+    draw = args.get("draw", 0, type=int)
+    start = args.get("start", 0, type=int)
+    length = args.get("length", 50, type=int)
+    search_value = args.get("search[value]", "", type=str).strip().lower()
+    column_filters = _get_column_filters(args)
+
+    diacritics = get_diacritics_mode(args.get("diacritics", type=str))
+    where_clause, params = _build_search_clause(search_value, column_filters, diacritics)
+    order_index = args.get("order[0][column]", type=int)
+    order_dir = args.get("order[0][dir]", "asc")
     default_order = f" ORDER BY {COLUMN_SQL[DATA_KEYS[0]]} ASC"
     order_clause = _get_order_clause(order_index, order_dir, default_order)
 
-    cur = conn.cursor()
-    cur.execute(f"SELECT COUNT(*) {BASE_FROM}")
-    total_count = fetch_count(cur)
-
-    if where_clause:
-        cur.execute(f"SELECT COUNT(*) {BASE_FROM}{where_clause}", params)
-        filtered_count = fetch_count(cur)
-    else:
-        filtered_count = total_count
-
     limit_clause = ""
     limit_params = []
     if length != -1:
         limit_clause = " LIMIT %s OFFSET %s"
         limit_params = [length, start]
 
-    cur.execute(
-        f"SELECT {SELECT_COLUMNS} {BASE_FROM}{where_clause}{order_clause}{limit_clause}",
-        params + limit_params,
+    # The filtered count rides along with the page as a window aggregate.
+    count_column = ", COUNT(*) OVER () AS filtered_count" if where_clause else ""
+    page_sql = compile_sql(
+        ("datatable_page", where_clause, order_clause, limit_clause),
+        lambda: f"SELECT {SELECT_COLUMNS}{count_column} {BASE_FROM}{where_clause}{order_clause}{limit_clause}",
     )
+    count_sql = compile_sql(
+        ("datatable_count", where_clause),
+        lambda: f"SELECT COUNT(*) {BASE_FROM}{where_clause}",
+    )
+    return {
+        "draw": draw,
+        "start": start,
+        "filtered": bool(where_clause),
+        "count_mode": _get_count_mode(args),
+        "page": (page_sql, params + limit_params),
+        "count": (count_sql, params),
+    }
+
+
+# Strip the window count off the page rows. The filtered count is None when
+# the page is empty past the first row and plan["count"] has to run.
+def split_filtered_count(plan, rows, cols, total_count):
+    if not plan["filtered"]:
+        return rows, cols, total_count
+    if rows:
+        return [row[:-1] for row in rows], cols[:-1], rows[0][-1]
+    if plan["start"] > 0:
+        return rows, cols, None
+    return rows, cols, 0
+
+
+def datatable_payload(plan, rows, cols, total_count, filtered_count):
+    return {
+        "draw": plan["draw"],
+        "recordsTotal": total_count,
+        "recordsFiltered": filtered_count,
+        "data": add_jsonld_list([dict(zip(cols, row)) for row in rows] if cols else []),
+    }
+
+
+@main.route("/api/zdenci")
+def api_zdenci():
+    plan = plan_datatable(request.args)
+    cur = get_conn().cursor()
+    total_count = _get_total_count(cur, plan["count_mode"])
+
+    execute_prepared(cur, *plan["page"])
     rows, cols = fetch_rows_with_cols(cur)
-    data = add_jsonld_list([dict(zip(cols, row)) for row in rows] if cols else [])
+    rows, cols, filtered_count = split_filtered_count(plan, rows, cols, total_count)
+    if filtered_count is None:
+        execute_prepared(cur, *plan["count"])
+        filtered_count = fetch_count(cur)
     cur.close()
 
-    return jsonify(
-        {
-            "draw": draw,
-            "recordsTotal": total_count,
-            "recordsFiltered": filtered_count,
-            "data": data,
-        }
-    )
+    return jsonld_response(datatable_payload(plan, rows, cols, total_count, filtered_count))
 
 
 @main.route("/api/zdenci/export")
@@ -208,25 +284,50 @@ def api_zdenci_export():
     if search_value is None:
         search_value = request.args.get("search[value]", "", type=str)
     search_value = search_value.strip().lower()
-    column_filters = _get_column_filters()
-    where_clause, params = _build_search_clause(search_value, column_filters)
-    order_clause = " ORDER BY g.naziv_gc ASC, z.lokacija ASC"
-
-    data = fetch_zdenci_data(where_clause=where_clause, params=params, order_clause=order_clause)
+    column_filters = _get_column_filters(request.args)
+    diacritics = get_diacritics_mode(request.args.get("diacritics", type=str))
+    where_clause, params = _build_search_clause(search_value, column_filters, diacritics)
+    order_clause = " ORDER BY g.naziv_gc ASC, z.lokacija ASC, z.id ASC"
+
+    stream = _stream_export(fmt, where_clause, params, order_clause)
+    # Pull the first chunk now so query errors still surface as a normal error response.
+    try:
+        first_chunk = next(stream)
+    except StopIteration:
+        first_chunk = ""
+    except Exception:
+        stream.close()
+        raise
+    body = chain([first_chunk], stream)
 
     if fmt == "json":
-        payload = build_grouped_json_payload(data)
-        return Response(
-            payload,
+        response = Response(
+            body,
             mimetype="application/json",
             headers={
                 "Content-Disposition": "attachment; filename=zdenci_filtered.json"
             },
         )
+    else:
+        response = Response(
+            body,
+            mimetype="text/csv",
+            headers={"Content-Disposition": "attachment; filename=zdenci_filtered.csv"},
+        )
+    if fmt == "json" and get_jsonld_mode() == "shared":
+        response.headers["Link"] = jsonld_link_header()
+    response.call_on_close(stream.close)
+    return response
 
-    payload = build_csv_payload(data)
-    return Response(
-        payload,
-        mimetype="text/csv",
-        headers={"Content-Disposition": "attachment; filename=zdenci_filtered.csv"},
-    )
+
+# Export rows straight from a server-side cursor to the response, chunk by chunk.
+def _stream_export(fmt, where_clause, params, order_clause):
+    with pooled_connection() as conn:
+        rows = iter_zdenci_data(
+            conn, where_clause=where_clause, params=params, order_clause=order_clause
+        )
+        writer = iter_grouped_json_payload if fmt == "json" else iter_csv_payload
+        try:
+            yield from writer(rows)
+        finally:
+            rows.close()
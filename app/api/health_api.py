@@ -0,0 +1,25 @@
+import psycopg2
+
+from ..blueprint import main
+from .api_response import json_response
+from ..data.db import check_ready, get_pool
+
+
+@main.route("/api/v1/health/live", methods=["GET"])
+def api_v1_health_live():
+    return json_response(200, "Service is running.", {"live": True})
+
+
+@main.route("/api/v1/health/ready", methods=["GET"])
+def api_v1_health_ready():
+    try:
+        check_ready()
+    except psycopg2.Error as exc:
+        return json_response(
+            503,
+            "Database is not ready.",
+            {"ready": False, "detail": str(exc), "pool": get_pool().stats()},
+        )
+    return json_response(
+        200, "Service is ready.", {"ready": True, "pool": get_pool().stats()}
+    )
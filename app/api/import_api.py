@@ -0,0 +1,52 @@
+import io
+
+from flask import request
+import psycopg2
+
+from ..auth import _login_required
+from ..blueprint import main
+from .api_response import json_response
+from ..data.changes import notify_change
+from ..data.db import get_conn
+from ..data.importer import ImportValidationError, guess_import_format, import_zdenci
+
+
+# Accepts a multipart "file" field or the raw request body (text/csv or
+# application/geo+json); the body is streamed, not buffered.
+@main.route("/api/v1/zdenci/import", methods=["POST"])
+@_login_required
+def api_v1_zdenci_import():
+    upload = request.files.get("file")
+    if upload is not None:
+        binary = upload.stream
+        fmt = guess_import_format(upload.filename, upload.mimetype)
+    else:
+        binary = request.stream
+        fmt = guess_import_format(content_type=request.mimetype)
+    fmt = request.args.get("format", fmt, type=str)
+    mode = request.args.get("mode", "upsert", type=str)
+    if fmt is None:
+        return json_response(
+            400,
+            "Unknown import format.",
+            {"detail": "Set format=csv or format=geojson."},
+        )
+
+    conn = get_conn()
+    try:
+        report = import_zdenci(
+            conn, io.TextIOWrapper(binary, encoding="utf-8-sig", newline=""), fmt, mode
+        )
+    except ImportValidationError as exc:
+        return json_response(
+            400, "Import rejected.", {"rows": exc.rows, "errors": exc.errors}
+        )
+    except ValueError as exc:
+        return json_response(400, "Invalid import request.", {"detail": str(exc)})
+    except psycopg2.IntegrityError as exc:
+        return json_response(400, "Integrity error.", {"detail": str(exc)})
+    except psycopg2.Error as exc:
+        return json_response(500, "Database error.", {"detail": str(exc)})
+
+    notify_change()
+    return json_response(200, "Import completed.", report)
@@ -1,41 +1,79 @@
-from decimal import Decimal
+import base64
+import binascii
+import json
 from flask import request
 import psycopg2
+from psycopg2.errors import ForeignKeyViolation
+from psycopg2.extras import execute_values
 
 from ..blueprint import main
 from .api_response import json_response
-from ..data.db import conn, fetch_count, fetch_row_with_cols, fetch_rows_with_cols
+from .conditional import conditional_get
+from ..data.cache import cached_result
+from ..data.changes import notify_change
+from ..data.db import fetch_count, fetch_row_with_cols, fetch_rows_with_cols, get_conn
 from ..data.jsonld import add_jsonld, add_jsonld_list
+from ..data.prepared import compile_sql, execute_prepared
+from ..data.search import build_global_search_clause, get_diacritics_mode
+from ..data.stats import district_totals, status_totals
 from ..data.zdenci_constants import (
     BASE_FROM,
     MAP_SELECT_COLUMNS,
     REST_PAYLOAD_FIELDS,
-    REST_SEARCH_COLUMNS,
     REST_SELECT_COLUMNS,
 )
 
+OFFSET_MAX_LIMIT = 200
+KEYSET_MAX_LIMIT = 1000
+BULK_MAX_OPERATIONS = 1000
+BULK_MODES = {"atomic", "partial"}
+BULK_OPERATIONS = {"create", "update", "delete"}
+PAYLOAD_SQL_TYPES = {"text": "text", "int": "integer", "num": "numeric"}
+
+# Writes are single statements: the CTE's RETURNING rows are joined to
+# gradska_cetvrt, so the response row needs no second query. Inserts and
+# updates name only the supplied columns, with one statement text per set of
+# columns: omitted columns keep their defaults on insert, and UPDATE OF
+# triggers fire only when their columns change.
+WRITE_FIELDS = [key for key in REST_PAYLOAD_FIELDS if key != "id"]
+_WRITE_TYPES = {key: PAYLOAD_SQL_TYPES[REST_PAYLOAD_FIELDS[key]] for key in WRITE_FIELDS}
+_WRITE_RESULT = (
+    f"SELECT {REST_SELECT_COLUMNS} FROM z LEFT JOIN gradska_cetvrt g ON z.naziv_gc_id = g.id"
+)
+ZDENAC_BY_ID_SQL = f"SELECT {REST_SELECT_COLUMNS} {BASE_FROM} WHERE z.id = %s"
+
 
-def _normalize_value(value):
-    if isinstance(value, Decimal):
-        return float(value)
-    return value
+def _zdenac_insert_sql(columns):
+    values = ", ".join(f"%s::{_WRITE_TYPES[key]}" for key in columns)
+    return (
+        f"WITH z AS (INSERT INTO zdenac ({', '.join(columns)}) VALUES ({values}) "
+        f"RETURNING *) {_WRITE_RESULT}"
+    )
 
 
-def _normalize_row(row):
-    return {key: _normalize_value(value) for key, value in row.items()}
+def _zdenac_update_sql(columns):
+    set_clause = ", ".join(f"{key} = %s::{_WRITE_TYPES[key]}" for key in columns)
+    return f"WITH z AS (UPDATE zdenac SET {set_clause} WHERE id = %s RETURNING *) {_WRITE_RESULT}"
 
 
+# Decimal values are left as fetched; the app's JSON provider writes them as
+# numbers.
 def _rows_to_dicts(rows, cols):
     if not cols:
         return []
-    return [_normalize_row(dict(zip(cols, row))) for row in rows]
+    return [dict(zip(cols, row)) for row in rows]
+
+
+# Rows as JSON-LD items; also used by the ASGI views.
+def zdenac_items(rows, cols):
+    return add_jsonld_list(_rows_to_dicts(rows, cols))
 
 
 def _fetch_row_dict(cur):
     row, cols = fetch_row_with_cols(cur)
     if not row:
         return None
-    return _normalize_row(dict(zip(cols, row)))
+    return dict(zip(cols, row))
 
 
 def _parse_payload(payload, required_fields=None):
@@ -83,106 +121,213 @@ def _parse_payload(payload, required_fields=None):
     return normalized, []
 
 
-def _gc_exists(gc_id):
-    cur = conn.cursor()
-    cur.execute("SELECT 1 FROM gradska_cetvrt WHERE id = %s", (gc_id,))
-    exists = cur.fetchone() is not None
-    cur.close()
-    return exists
+REST_FILTER_CLAUSES = {
+    "naziv_gc_id": "z.naziv_gc_id = %s",
+    "status_odrz": "LOWER(z.status_odrz) = %s",
+    "aktivan_da_ne": "LOWER(z.aktivan_da_ne) = %s",
+}
 
 
-def _build_rest_filters():
-    clauses = []
-    params = []
+def _build_rest_filters(args):
+    search_value = args.get("search", "", type=str).strip().lower()
+    diacritics = get_diacritics_mode(args.get("diacritics", type=str))
+    search_clause, params = build_global_search_clause(search_value, diacritics)
+    present = []
 
-    search_value = request.args.get("search", "", type=str).strip().lower()
-    if search_value:
-        like = f"%{search_value}%"
-        search_clauses = [
-            f"LOWER(CAST({col} AS TEXT)) LIKE %s" for col in REST_SEARCH_COLUMNS
-        ]
-        clauses.append("(" + " OR ".join(search_clauses) + ")")
-        params.extend([like] * len(search_clauses))
-
-    gc_raw = request.args.get("naziv_gc_id", None, type=str)
+    gc_raw = args.get("naziv_gc_id", None, type=str)
     if gc_raw is not None and gc_raw.strip() != "":
         try:
             gc_id = int(gc_raw)
         except ValueError:
             raise ValueError("naziv_gc_id must be an integer.")
-        clauses.append("z.naziv_gc_id = %s")
+        present.append("naziv_gc_id")
         params.append(gc_id)
 
-    status_raw = request.args.get("status_odrz", None, type=str)
-    if status_raw is not None and status_raw.strip() != "":
-        clauses.append("LOWER(z.status_odrz) = %s")
-        params.append(status_raw.strip().lower())
+    for key in ("status_odrz", "aktivan_da_ne"):
+        raw = args.get(key, None, type=str)
+        if raw is not None and raw.strip() != "":
+            present.append(key)
+            params.append(raw.strip().lower())
+
+    shape = ("rest_where", search_clause, tuple(present))
+    return compile_sql(shape, lambda: _rest_where_sql(search_clause, present)), params
 
-    active_raw = request.args.get("aktivan_da_ne", None, type=str)
-    if active_raw is not None and active_raw.strip() != "":
-        clauses.append("LOWER(z.aktivan_da_ne) = %s")
-        params.append(active_raw.strip().lower())
 
+def _rest_where_sql(search_clause, present):
+    clauses = [search_clause] if search_clause else []
+    clauses.extend(REST_FILTER_CLAUSES[key] for key in present)
     if clauses:
-        return " WHERE " + " AND ".join(clauses), params
+        return " WHERE " + " AND ".join(clauses)
+    return ""
 
-    return "", []
 
+# Opaque keyset cursor over the zdenac_pkey ordering.
+def _encode_cursor(last_id):
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
-def _get_paging():
-    limit = request.args.get("limit", 50, type=int)
-    offset = request.args.get("offset", 0, type=int)
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return int(json.loads(raw)["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("after must be a next_cursor value from a previous page.")
+
+
+def _get_paging(args):
+    limit = args.get("limit", 50, type=int)
+    offset = args.get("offset", 0, type=int)
     if limit is None or offset is None:
         raise ValueError("limit and offset must be integers.")
-    if limit < 1 or limit > 200:
-        raise ValueError("limit must be between 1 and 200.")
     if offset < 0:
         raise ValueError("offset must be zero or greater.")
-    return limit, offset
 
+    after = None
+    after_raw = args.get("after", "", type=str).strip()
+    if after_raw:
+        if offset:
+            raise ValueError("Use either offset or after, not both.")
+        after = _decode_cursor(after_raw)
+
+    # Keyset pages cost the same at any depth and skip the count, so they may
+    # be larger.
+    max_limit = OFFSET_MAX_LIMIT if after is None else KEYSET_MAX_LIMIT
+    if limit < 1 or limit > max_limit:
+        raise ValueError(
+            f"limit must be between 1 and {OFFSET_MAX_LIMIT} "
+            f"({KEYSET_MAX_LIMIT} when paging with after)."
+        )
+    return limit, offset, after
+
+
+def _add_keyset_clause(where_clause, params, after):
+    if after is None:
+        return where_clause, params
+    joiner = " AND " if where_clause else " WHERE "
+    return f"{where_clause}{joiner}z.id > %s", params + [after]
+
+
+# Rows are fetched with limit + 1 to learn whether another page exists.
+def _split_keyset_page(rows, cols, limit):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode_cursor(rows[-1][cols.index("id")])
+
+
+# Query plans for the paged GET views: SQL text and parameters of every
+# statement, plus what the payload needs. The Flask views and the ASGI views
+# (app/asgi) execute the same plans. Raises ValueError for invalid arguments.
+def plan_zdenci_list(args):
+    limit, offset, after = _get_paging(args)
+    where_clause, params = _build_rest_filters(args)
+    count_query = None
+    if after is None:
+        count_sql = compile_sql(
+            ("rest_count", where_clause),
+            lambda: f"SELECT COUNT(*) {BASE_FROM}{where_clause}",
+        )
+        count_query = (count_sql, params)
 
-def _get_zdenac_by_id(cur, zdenac_id):
-    cur.execute(
-        f"SELECT {REST_SELECT_COLUMNS} {BASE_FROM} WHERE z.id = %s",
-        (zdenac_id,),
+    page_where, page_params = _add_keyset_clause(where_clause, params, after)
+    page_sql = compile_sql(
+        ("rest_page", page_where),
+        lambda: f"SELECT {REST_SELECT_COLUMNS} {BASE_FROM}{page_where} ORDER BY z.id ASC LIMIT %s OFFSET %s",
+    )
+    return {
+        "limit": limit,
+        "offset": offset,
+        "count": count_query,
+        "page": (page_sql, page_params + [limit + 1, offset]),
+    }
+
+
+def zdenci_list_payload(plan, rows, cols, total_count):
+    rows, next_cursor = _split_keyset_page(rows, cols, plan["limit"])
+    return {
+        "items": zdenac_items(rows, cols),
+        "limit": plan["limit"],
+        "offset": plan["offset"],
+        "total": total_count,
+        "next_cursor": next_cursor,
+    }
+
+
+def plan_zdenci_koordinate(args):
+    limit, offset, after = _get_paging(args)
+    where_clause, params = _add_keyset_clause(
+        " WHERE z.lon IS NOT NULL AND z.lat IS NOT NULL", [], after
     )
+    page_sql = compile_sql(
+        ("koordinate_page", where_clause),
+        lambda: f"SELECT {MAP_SELECT_COLUMNS} {BASE_FROM}{where_clause} ORDER BY z.id ASC LIMIT %s OFFSET %s",
+    )
+    return {"limit": limit, "offset": offset, "page": (page_sql, params + [limit + 1, offset])}
+
+
+def zdenci_koordinate_payload(plan, rows, cols):
+    rows, next_cursor = _split_keyset_page(rows, cols, plan["limit"])
+    return {
+        "items": zdenac_items(rows, cols),
+        "limit": plan["limit"],
+        "offset": plan["offset"],
+        "next_cursor": next_cursor,
+    }
+
+
+def _get_zdenac_by_id(cur, zdenac_id):
+    execute_prepared(cur, ZDENAC_BY_ID_SQL, (zdenac_id,))
     return _fetch_row_dict(cur)
 
 
+def _is_gc_fk_violation(exc):
+    return (
+        isinstance(exc, ForeignKeyViolation)
+        and exc.diag.constraint_name == "zdenac_naziv_gc_id_fkey"
+    )
+
+
+def _gc_fk_error():
+    return json_response(
+        400,
+        "Invalid naziv_gc_id.",
+        {"detail": "naziv_gc_id does not exist."},
+    )
+
+
 @main.route("/api/v1/zdenci", methods=["GET"])
+@conditional_get
 def api_v1_zdenci_list():
     try:
-        limit, offset = _get_paging()
-        where_clause, params = _build_rest_filters()
+        plan = plan_zdenci_list(request.args)
     except ValueError as exc:
         return json_response(400, "Invalid query parameters.", {"detail": str(exc)})
 
+    conn = get_conn()
     cur = conn.cursor()
     try:
-        cur.execute(f"SELECT COUNT(*) {BASE_FROM}{where_clause}", params)
-        total_count = fetch_count(cur)
+        total_count = None
+        if plan["count"]:
+            execute_prepared(cur, *plan["count"])
+            total_count = fetch_count(cur)
 
-        cur.execute(
-            f"SELECT {REST_SELECT_COLUMNS} {BASE_FROM}{where_clause} ORDER BY z.id ASC LIMIT %s OFFSET %s",
-            params + [limit, offset],
-        )
+        execute_prepared(cur, *plan["page"])
         rows, cols = fetch_rows_with_cols(cur)
-        data = add_jsonld_list(_rows_to_dicts(rows, cols))
+        data = zdenci_list_payload(plan, rows, cols, total_count)
     except psycopg2.Error as exc:
         conn.rollback()
         cur.close()
         return json_response(500, "Database error.", {"detail": str(exc)})
 
     cur.close()
-    return json_response(
-        200,
-        "Fetched zdenac collection.",
-        {"items": data, "limit": limit, "offset": offset, "total": total_count},
-    )
+    return json_response(200, "Fetched zdenac collection.", data)
 
 
 @main.route("/api/v1/zdenci/<int:zdenac_id>", methods=["GET"])
+@conditional_get
 def api_v1_zdenci_get(zdenac_id):
+    conn = get_conn()
     cur = conn.cursor()
     try:
         data = _get_zdenac_by_id(cur, zdenac_id)
@@ -216,35 +361,21 @@ def api_v1_zdenci_create():
             {"detail": "Remove id from the request body."},
         )
 
-    if data.get("naziv_gc_id") is not None:
-        try:
-            if not _gc_exists(data["naziv_gc_id"]):
-                return json_response(
-                    400,
-                    "Invalid naziv_gc_id.",
-                    {"detail": "naziv_gc_id does not exist."},
-                )
-        except psycopg2.Error as exc:
-            conn.rollback()
-            return json_response(500, "Database error.", {"detail": str(exc)})
-
-    columns = list(data.keys())
-    values = [data[key] for key in columns]
-    placeholders = ", ".join(["%s"] * len(columns))
-    col_sql = ", ".join(columns)
+    columns = tuple(key for key in WRITE_FIELDS if key in data)
+    insert_sql = compile_sql(("zdenac_insert", columns), lambda: _zdenac_insert_sql(columns))
 
+    conn = get_conn()
     cur = conn.cursor()
     try:
-        cur.execute(
-            f"INSERT INTO zdenac ({col_sql}) VALUES ({placeholders}) RETURNING id",
-            values,
-        )
-        new_id = fetch_count(cur)
+        execute_prepared(cur, insert_sql, [data[key] for key in columns])
+        data = _fetch_row_dict(cur)
         conn.commit()
-        data = _get_zdenac_by_id(cur, new_id)
+        notify_change()
     except psycopg2.IntegrityError as exc:
         conn.rollback()
         cur.close()
+        if _is_gc_fk_violation(exc):
+            return _gc_fk_error()
         return json_response(400, "Integrity error.", {"detail": str(exc)})
     except psycopg2.Error as exc:
         conn.rollback()
@@ -279,29 +410,16 @@ def api_v1_zdenci_update(zdenac_id):
                 {"detail": "Provide at least one field to update."},
             )
 
-    if data.get("naziv_gc_id") is not None:
-        try:
-            if not _gc_exists(data["naziv_gc_id"]):
-                return json_response(
-                    400,
-                    "Invalid naziv_gc_id.",
-                    {"detail": "naziv_gc_id does not exist."},
-                )
-        except psycopg2.Error as exc:
-            conn.rollback()
-            return json_response(500, "Database error.", {"detail": str(exc)})
-
-    set_clause = ", ".join([f"{key} = %s" for key in data.keys()])
-    values = list(data.values()) + [zdenac_id]
+    columns = tuple(key for key in WRITE_FIELDS if key in data)
+    params = [data[key] for key in columns] + [zdenac_id]
+    update_sql = compile_sql(("zdenac_update", columns), lambda: _zdenac_update_sql(columns))
 
+    conn = get_conn()
     cur = conn.cursor()
     try:
-        cur.execute(
-            f"UPDATE zdenac SET {set_clause} WHERE id = %s RETURNING id",
-            values,
-        )
-        updated = cur.fetchone()
-        if not updated:
+        execute_prepared(cur, update_sql, params)
+        data = _fetch_row_dict(cur)
+        if not data:
             conn.rollback()
             cur.close()
             return json_response(
@@ -310,10 +428,12 @@ def api_v1_zdenci_update(zdenac_id):
                 {"detail": f"Zdenac {zdenac_id} does not exist."},
             )
         conn.commit()
-        data = _get_zdenac_by_id(cur, zdenac_id)
+        notify_change()
     except psycopg2.IntegrityError as exc:
         conn.rollback()
         cur.close()
+        if _is_gc_fk_violation(exc):
+            return _gc_fk_error()
         return json_response(400, "Integrity error.", {"detail": str(exc)})
     except psycopg2.Error as exc:
         conn.rollback()
@@ -326,9 +446,10 @@ def api_v1_zdenci_update(zdenac_id):
 
 @main.route("/api/v1/zdenci/<int:zdenac_id>", methods=["DELETE"])
 def api_v1_zdenci_delete(zdenac_id):
+    conn = get_conn()
     cur = conn.cursor()
     try:
-        cur.execute("DELETE FROM zdenac WHERE id = %s RETURNING id", (zdenac_id,))
+        execute_prepared(cur, "DELETE FROM zdenac WHERE id = %s RETURNING id", (zdenac_id,))
         deleted = cur.fetchone()
         if not deleted:
             conn.rollback()
@@ -339,6 +460,7 @@ def api_v1_zdenci_delete(zdenac_id):
                 {"detail": f"Zdenac {zdenac_id} does not exist."},
             )
         conn.commit()
+        notify_change()
     except psycopg2.Error as exc:
         conn.rollback()
         cur.close()
@@ -348,81 +470,343 @@ def api_v1_zdenci_delete(zdenac_id):
     return json_response(200, "Zdenac deleted.", {"id": zdenac_id})
 
 
-@main.route("/api/v1/zdenci/statusi", methods=["GET"])
-def api_v1_zdenci_statusi():
-    cur = conn.cursor()
+def _bulk_result(index, op, status, zdenac_id=None, errors=None):
+    result = {"index": index, "op": op, "status": status, "id": zdenac_id}
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+def _validate_bulk_operation(operation):
+    if not isinstance(operation, dict):
+        return None, ["Operation must be an object."]
+    op = operation.get("op")
+    if op not in BULK_OPERATIONS:
+        return None, [f"op must be one of: {', '.join(sorted(BULK_OPERATIONS))}."]
+    unknown = [key for key in operation.keys() if key not in {"op", "id", "data"}]
+    if unknown:
+        return None, [f"Unknown fields: {', '.join(sorted(unknown))}."]
+
+    zdenac_id = operation.get("id")
+    if op == "create":
+        if zdenac_id is not None:
+            return None, ["id must not be provided when creating."]
+    elif not isinstance(zdenac_id, int) or isinstance(zdenac_id, bool):
+        return None, ["id must be an integer."]
+
+    if op == "delete":
+        if "data" in operation:
+            return None, ["data must not be provided when deleting."]
+        return {"op": op, "id": zdenac_id, "data": {}}, []
+
+    if not isinstance(operation.get("data"), dict):
+        return None, ["data must be an object."]
+    required_fields = ["lokacija"] if op == "create" else None
+    data, errors = _parse_payload(operation["data"], required_fields=required_fields)
+    if errors:
+        return None, errors
+    if "id" in data:
+        if op == "create" or data["id"] != zdenac_id:
+            return None, ["id must not be set in data."]
+        data.pop("id")
+    if not data:
+        return None, ["Provide at least one field."]
+    return {"op": op, "id": zdenac_id, "data": data}, []
+
+
+def _missing_gc_ids(cur, gc_ids):
+    if not gc_ids:
+        return set()
+    cur.execute("SELECT id FROM gradska_cetvrt WHERE id = ANY(%s)", (sorted(gc_ids),))
+    return gc_ids - {row[0] for row in cur.fetchall()}
+
+
+def _bulk_columns(items):
+    keys = set()
+    for item in items:
+        keys.update(item["data"].keys())
+    return [key for key in REST_PAYLOAD_FIELDS if key in keys]
+
+
+def _bulk_template(columns):
+    casts = ", ".join(f"%s::{PAYLOAD_SQL_TYPES[REST_PAYLOAD_FIELDS[key]]}" for key in columns)
+    return f"(%s::integer, {casts})"
+
+
+# Ids are drawn from the sequence up front, so each create knows its id
+# without relying on the order of RETURNING rows. One INSERT per distinct set
+# of columns, so omitted columns get their defaults rather than NULL.
+def _bulk_create(cur, items, results):
+    cur.execute(
+        "SELECT nextval(pg_get_serial_sequence('zdenac', 'id')) FROM generate_series(1, %s)",
+        (len(items),),
+    )
+    groups = {}
+    for new_id, item in zip((row[0] for row in cur.fetchall()), items):
+        groups.setdefault(tuple(_bulk_columns([item])), []).append((new_id, item))
+
+    for columns, group in groups.items():
+        rows = [[new_id] + [item["data"][key] for key in columns] for new_id, item in group]
+        execute_values(
+            cur,
+            f"INSERT INTO zdenac (id, {', '.join(columns)}) VALUES %s",
+            rows,
+            template=_bulk_template(columns),
+            page_size=len(rows),
+        )
+        for new_id, item in group:
+            results[item["index"]] = _bulk_result(item["index"], "create", 201, new_id)
+
+
+# One UPDATE ... FROM (VALUES ...) per distinct set of columns.
+def _bulk_update(cur, items, results):
+    groups = {}
+    for item in items:
+        groups.setdefault(tuple(_bulk_columns([item])), []).append(item)
+
+    updated = set()
+    for columns, group in groups.items():
+        set_clause = ", ".join(f"{key} = v.{key}" for key in columns)
+        rows = [[item["id"]] + [item["data"][key] for key in columns] for item in group]
+        found = execute_values(
+            cur,
+            f"""
+            UPDATE zdenac AS z SET {set_clause}
+            FROM (VALUES %s) AS v(id, {', '.join(columns)})
+            WHERE z.id = v.id
+            RETURNING z.id
+            """,
+            rows,
+            template=_bulk_template(columns),
+            page_size=len(rows),
+            fetch=True,
+        )
+        updated.update(row[0] for row in found)
+    for item in items:
+        status = 200 if item["id"] in updated else 404
+        errors = None if status == 200 else [f"Zdenac {item['id']} does not exist."]
+        results[item["index"]] = _bulk_result(item["index"], "update", status, item["id"], errors)
+
+
+def _bulk_delete(cur, items, results):
+    cur.execute(
+        "DELETE FROM zdenac WHERE id = ANY(%s) RETURNING id",
+        ([item["id"] for item in items],),
+    )
+    deleted = {row[0] for row in cur.fetchall()}
+    for item in items:
+        status = 200 if item["id"] in deleted else 404
+        errors = None if status == 200 else [f"Zdenac {item['id']} does not exist."]
+        results[item["index"]] = _bulk_result(item["index"], "delete", status, item["id"], errors)
+
+
+# In partial mode a failing statement is retried item by item, each behind its
+# own savepoint, so one bad row does not discard the rest of its group. Any
+# database error (constraint, out-of-range value, bad cast) fails only its
+# item.
+def _apply_bulk_group(cur, apply, items, results, partial):
+    if not items:
+        return
+    if not partial:
+        apply(cur, items, results)
+        return
+
+    cur.execute("SAVEPOINT bulk_group")
     try:
-        cur.execute(
-            """
-            SELECT COALESCE(status_odrz, 'Unknown') AS status, COUNT(*) AS total
-            FROM zdenac
-            GROUP BY status
-            ORDER BY total DESC
-            """
+        apply(cur, items, results)
+    except psycopg2.Error:
+        cur.execute("ROLLBACK TO SAVEPOINT bulk_group")
+        for item in items:
+            cur.execute("SAVEPOINT bulk_item")
+            try:
+                apply(cur, [item], results)
+            except psycopg2.Error as exc:
+                cur.execute("ROLLBACK TO SAVEPOINT bulk_item")
+                results[item["index"]] = _bulk_result(
+                    item["index"], item["op"], 400, item["id"], [str(exc).strip()]
+                )
+            else:
+                cur.execute("RELEASE SAVEPOINT bulk_item")
+    else:
+        cur.execute("RELEASE SAVEPOINT bulk_group")
+
+
+def _bulk_rejected(mode, operations, results):
+    for index, operation in enumerate(operations):
+        if index not in results or results[index]["status"] < 400:
+            op = operation.get("op") if isinstance(operation, dict) else None
+            zdenac_id = operation.get("id") if isinstance(operation, dict) else None
+            results[index] = _bulk_result(
+                index, op, 424, zdenac_id, ["Not applied because another operation failed."]
+            )
+    return json_response(
+        400,
+        "Bulk operations rejected.",
+        {"mode": mode, "results": [results[index] for index in sorted(results)]},
+    )
+
+
+@main.route("/api/v1/zdenci/bulk", methods=["POST"])
+def api_v1_zdenci_bulk():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get("operations"), list):
+        return json_response(
+            400,
+            "Invalid request payload.",
+            {"detail": "Expected an object with an operations array."},
         )
-        rows, cols = fetch_rows_with_cols(cur)
-        data = add_jsonld_list(_rows_to_dicts(rows, cols))
+    mode = payload.get("mode", "atomic")
+    if mode not in BULK_MODES:
+        return json_response(
+            400,
+            "Invalid request payload.",
+            {"detail": f"mode must be one of: {', '.join(sorted(BULK_MODES))}."},
+        )
+    operations = payload["operations"]
+    if not operations or len(operations) > BULK_MAX_OPERATIONS:
+        return json_response(
+            400,
+            "Invalid request payload.",
+            {"detail": f"operations must contain between 1 and {BULK_MAX_OPERATIONS} items."},
+        )
+
+    results = {}
+    valid = []
+    seen_ids = set()
+    for index, operation in enumerate(operations):
+        item, errors = _validate_bulk_operation(operation)
+        if item is not None and item["id"] is not None:
+            if item["id"] in seen_ids:
+                errors = ["id appears in more than one operation."]
+            seen_ids.add(item["id"])
+        if errors:
+            op = operation.get("op") if isinstance(operation, dict) else None
+            zdenac_id = operation.get("id") if isinstance(operation, dict) else None
+            results[index] = _bulk_result(index, op, 400, zdenac_id, errors)
+        else:
+            item["index"] = index
+            valid.append(item)
+
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        gc_ids = {
+            item["data"]["naziv_gc_id"]
+            for item in valid
+            if item["data"].get("naziv_gc_id") is not None
+        }
+        missing = _missing_gc_ids(cur, gc_ids)
+    except psycopg2.Error as exc:
+        conn.rollback()
+        cur.close()
+        return json_response(500, "Database error.", {"detail": str(exc)})
+
+    applicable = []
+    for item in valid:
+        if item["data"].get("naziv_gc_id") in missing:
+            results[item["index"]] = _bulk_result(
+                item["index"], item["op"], 400, item["id"], ["naziv_gc_id does not exist."]
+            )
+        else:
+            applicable.append(item)
+
+    if mode == "atomic" and results:
+        conn.rollback()
+        cur.close()
+        return _bulk_rejected(mode, operations, results)
+
+    partial = mode == "partial"
+    try:
+        for op, apply in (
+            ("delete", _bulk_delete),
+            ("update", _bulk_update),
+            ("create", _bulk_create),
+        ):
+            items = [item for item in applicable if item["op"] == op]
+            _apply_bulk_group(cur, apply, items, results, partial)
+        if not partial and any(result["status"] >= 400 for result in results.values()):
+            conn.rollback()
+            cur.close()
+            return _bulk_rejected(mode, operations, results)
+        conn.commit()
+    except psycopg2.IntegrityError as exc:
+        conn.rollback()
+        cur.close()
+        return json_response(400, "Integrity error.", {"detail": str(exc)})
     except psycopg2.Error as exc:
         conn.rollback()
         cur.close()
         return json_response(500, "Database error.", {"detail": str(exc)})
 
     cur.close()
+    ordered = [results[index] for index in sorted(results)]
+    summary = {"created": 0, "updated": 0, "deleted": 0, "failed": 0}
+    for result in ordered:
+        if result["status"] >= 400:
+            summary["failed"] += 1
+        else:
+            summary[f"{result['op']}d"] += 1
+    if summary["created"] or summary["updated"] or summary["deleted"]:
+        notify_change()
+    return json_response(
+        200,
+        "Bulk operations applied.",
+        {"mode": mode, "summary": summary, "results": ordered},
+    )
+
+
+def _load_status_summary(conn):
+    return add_jsonld_list(status_totals(conn))
+
+
+@main.route("/api/v1/zdenci/statusi", methods=["GET"])
+@conditional_get
+def api_v1_zdenci_statusi():
+    conn = get_conn()
+    try:
+        data = cached_result("statusi", {}, lambda: _load_status_summary(conn))
+    except psycopg2.Error as exc:
+        conn.rollback()
+        return json_response(500, "Database error.", {"detail": str(exc)})
+
     return json_response(200, "Fetched status summary.", {"items": data})
 
 
 @main.route("/api/v1/zdenci/koordinate", methods=["GET"])
+@conditional_get
 def api_v1_zdenci_koordinate():
     try:
-        limit, offset = _get_paging()
+        plan = plan_zdenci_koordinate(request.args)
     except ValueError as exc:
         return json_response(400, "Invalid query parameters.", {"detail": str(exc)})
 
+    conn = get_conn()
     cur = conn.cursor()
     try:
-        cur.execute(
-            f"""
-            SELECT {MAP_SELECT_COLUMNS} {BASE_FROM}
-            WHERE z.lon IS NOT NULL AND z.lat IS NOT NULL
-            ORDER BY z.id ASC
-            LIMIT %s OFFSET %s
-            """,
-            (limit, offset),
-        )
+        execute_prepared(cur, *plan["page"])
         rows, cols = fetch_rows_with_cols(cur)
-        data = add_jsonld_list(_rows_to_dicts(rows, cols))
+        data = zdenci_koordinate_payload(plan, rows, cols)
     except psycopg2.Error as exc:
         conn.rollback()
         cur.close()
         return json_response(500, "Database error.", {"detail": str(exc)})
 
     cur.close()
-    return json_response(
-        200,
-        "Fetched coordinate list.",
-        {"items": data, "limit": limit, "offset": offset},
-    )
+    return json_response(200, "Fetched coordinate list.", data)
+
+
+def _load_district_summary(conn):
+    return district_totals(conn)
 
 
 @main.route("/api/v1/gradske-cetvrti", methods=["GET"])
+@conditional_get
 def api_v1_gradske_cetvrti():
-    cur = conn.cursor()
+    conn = get_conn()
     try:
-        cur.execute(
-            """
-            SELECT g.id AS id, g.naziv_gc AS naziv_gc, COUNT(z.id) AS total_zdenci
-            FROM gradska_cetvrt g
-            LEFT JOIN zdenac z ON z.naziv_gc_id = g.id
-            GROUP BY g.id, g.naziv_gc
-            ORDER BY g.naziv_gc ASC
-            """
-        )
-        rows, cols = fetch_rows_with_cols(cur)
-        data = _rows_to_dicts(rows, cols)
+        data = cached_result("gradske_cetvrti", {}, lambda: _load_district_summary(conn))
     except psycopg2.Error as exc:
         conn.rollback()
-        cur.close()
         return json_response(500, "Database error.", {"detail": str(exc)})
 
-    cur.close()
     return json_response(200, "Fetched city districts.", {"items": data})
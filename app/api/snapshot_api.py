@@ -0,0 +1,31 @@
+from ..auth import SNAPSHOT_JOB_KEY, _login_required, start_snapshot_refresh
+from ..blueprint import main
+from ..jobs import get_job, latest_job
+from .api_response import json_response
+
+
+@main.route("/api/v1/snapshots/refresh", methods=["POST"])
+@_login_required
+def api_v1_snapshots_refresh():
+    job, started = start_snapshot_refresh()
+    message = "Snapshot refresh started." if started else "Snapshot refresh already running."
+    return json_response(202, message, job)
+
+
+@main.route("/api/v1/snapshots/jobs/<job_id>", methods=["GET"])
+@_login_required
+def api_v1_snapshots_job(job_id):
+    job = get_job(job_id)
+    if not job:
+        return json_response(
+            404,
+            f"Job {job_id} not found.",
+            {"detail": f"Job {job_id} does not exist."},
+        )
+    return json_response(200, "Fetched job status.", job)
+
+
+@main.route("/api/v1/snapshots/status", methods=["GET"])
+@_login_required
+def api_v1_snapshots_status():
+    return json_response(200, "Fetched snapshot refresh status.", latest_job(SNAPSHOT_JOB_KEY))
@@ -0,0 +1,165 @@
+import math
+
+from flask import request
+import psycopg2
+
+from ..blueprint import main
+from .api_response import json_response
+from .conditional import conditional_get
+from ..data.db import get_conn
+from ..data.jsonld import add_jsonld_list
+from ..data.spatial import SPATIAL_KEYS, get_spatial_index
+from ..data.tiles import TILE_MAX_ZOOM, get_tile
+
+SPATIAL_MAX_LIMIT = 5000
+SPATIAL_MAX_RADIUS_M = 50000
+NEAREST_MAX_K = 100
+
+
+# float() also accepts "nan" and "inf", which no range check rejects.
+def _to_float(name, raw, minimum, maximum):
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be a number.") from None
+    if not math.isfinite(value) or value < minimum or value > maximum:
+        raise ValueError(f"{name} must be between {minimum} and {maximum}.")
+    return value
+
+
+def _get_float(name, minimum, maximum):
+    raw = request.args.get(name, "", type=str).strip()
+    if not raw:
+        raise ValueError(f"{name} is required.")
+    return _to_float(name, raw, minimum, maximum)
+
+
+def _get_point():
+    return _get_float("lon", -180, 180), _get_float("lat", -90, 90)
+
+
+def _get_radius():
+    radius = _get_float("radius", 0, SPATIAL_MAX_RADIUS_M)
+    if radius <= 0:
+        raise ValueError(f"radius must be greater than 0 and at most {SPATIAL_MAX_RADIUS_M}.")
+    return radius
+
+
+def _get_limit(name, default, maximum):
+    value = request.args.get(name, default, type=int)
+    if value is None or value < 1 or value > maximum:
+        raise ValueError(f"{name} must be an integer between 1 and {maximum}.")
+    return value
+
+
+def _get_bbox():
+    raw = request.args.get("bbox", "", type=str).strip()
+    parts = raw.split(",") if raw else []
+    if len(parts) != 4:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat.")
+    min_lon = _to_float("bbox min_lon", parts[0], -180, 180)
+    min_lat = _to_float("bbox min_lat", parts[1], -90, 90)
+    max_lon = _to_float("bbox max_lon", parts[2], -180, 180)
+    max_lat = _to_float("bbox max_lat", parts[3], -90, 90)
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError("bbox minimum must not exceed maximum.")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def _row_to_dict(row, distance=None):
+    item = dict(zip(SPATIAL_KEYS, row))
+    if distance is not None:
+        item["distance_m"] = round(distance, 1)
+    return item
+
+
+@main.route("/api/v1/zdenci/bbox", methods=["GET"])
+@conditional_get
+def api_v1_zdenci_bbox():
+    try:
+        bbox = _get_bbox()
+        limit = _get_limit("limit", 1000, SPATIAL_MAX_LIMIT)
+    except ValueError as exc:
+        return json_response(400, "Invalid query parameters.", {"detail": str(exc)})
+
+    conn = get_conn()
+    try:
+        index = get_spatial_index(conn)
+    except psycopg2.Error as exc:
+        conn.rollback()
+        return json_response(500, "Database error.", {"detail": str(exc)})
+
+    rows = sorted(index.bbox(*bbox), key=lambda row: row[0])
+    data = add_jsonld_list([_row_to_dict(row) for row in rows[:limit]])
+    return json_response(
+        200,
+        "Fetched zdenci in bounding box.",
+        {"items": data, "count": len(rows), "limit": limit, "truncated": len(rows) > limit},
+    )
+
+
+@main.route("/api/v1/zdenci/radius", methods=["GET"])
+@conditional_get
+def api_v1_zdenci_radius():
+    try:
+        lon, lat = _get_point()
+        radius = _get_radius()
+        limit = _get_limit("limit", 1000, SPATIAL_MAX_LIMIT)
+    except ValueError as exc:
+        return json_response(400, "Invalid query parameters.", {"detail": str(exc)})
+
+    conn = get_conn()
+    try:
+        index = get_spatial_index(conn)
+    except psycopg2.Error as exc:
+        conn.rollback()
+        return json_response(500, "Database error.", {"detail": str(exc)})
+
+    found = index.within(lon, lat, radius)
+    data = add_jsonld_list([_row_to_dict(row, distance) for distance, row in found[:limit]])
+    return json_response(
+        200,
+        "Fetched zdenci within radius.",
+        {"items": data, "count": len(found), "limit": limit, "truncated": len(found) > limit},
+    )
+
+
+@main.route("/api/v1/zdenci/nearest", methods=["GET"])
+@conditional_get
+def api_v1_zdenci_nearest():
+    try:
+        lon, lat = _get_point()
+        k = _get_limit("k", 5, NEAREST_MAX_K)
+    except ValueError as exc:
+        return json_response(400, "Invalid query parameters.", {"detail": str(exc)})
+
+    conn = get_conn()
+    try:
+        index = get_spatial_index(conn)
+    except psycopg2.Error as exc:
+        conn.rollback()
+        return json_response(500, "Database error.", {"detail": str(exc)})
+
+    found = index.nearest(lon, lat, k)
+    data = add_jsonld_list([_row_to_dict(row, distance) for distance, row in found])
+    return json_response(200, "Fetched nearest zdenci.", {"items": data, "k": k})
+
+
+@main.route("/api/v1/tiles/<int:z>/<int:x>/<int:y>", methods=["GET"])
+@conditional_get
+def api_v1_tiles(z, x, y):
+    if z > TILE_MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+        return json_response(
+            400,
+            "Invalid tile coordinates.",
+            {"detail": f"z must be between 0 and {TILE_MAX_ZOOM}; x and y between 0 and 2^z - 1."},
+        )
+
+    conn = get_conn()
+    try:
+        tile = get_tile(conn, z, x, y)
+    except psycopg2.Error as exc:
+        conn.rollback()
+        return json_response(500, "Database error.", {"detail": str(exc)})
+
+    return json_response(200, "Fetched map tile.", tile)
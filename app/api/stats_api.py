@@ -0,0 +1,61 @@
+import psycopg2
+
+from ..blueprint import main
+from .api_response import json_response
+from .conditional import conditional_get
+from ..data.cache import cached_result
+from ..data.db import get_conn
+from ..data.stats import coordinate_coverage, district_stats, status_stats, type_status_stats
+
+
+# Every statistic is one aggregate over the zdenac_stats groups, cached until
+# the next write.
+def _stats_response(name, loader, message):
+    conn = get_conn()
+    try:
+        data = cached_result(name, {}, lambda: loader(conn))
+    except psycopg2.Error as exc:
+        conn.rollback()
+        return json_response(500, "Database error.", {"detail": str(exc)})
+
+    return json_response(200, message, data)
+
+
+@main.route("/api/v1/stats/gradske-cetvrti", methods=["GET"])
+@conditional_get
+def api_v1_stats_districts():
+    return _stats_response(
+        "stats_districts",
+        lambda conn: {"items": district_stats(conn)},
+        "Fetched district statistics.",
+    )
+
+
+@main.route("/api/v1/stats/statusi", methods=["GET"])
+@conditional_get
+def api_v1_stats_statuses():
+    return _stats_response(
+        "stats_statuses",
+        lambda conn: {"items": status_stats(conn)},
+        "Fetched status statistics.",
+    )
+
+
+@main.route("/api/v1/stats/tipovi", methods=["GET"])
+@conditional_get
+def api_v1_stats_types():
+    return _stats_response(
+        "stats_types",
+        lambda conn: {"items": type_status_stats(conn)},
+        "Fetched type and status statistics.",
+    )
+
+
+@main.route("/api/v1/stats/koordinate", methods=["GET"])
+@conditional_get
+def api_v1_stats_coordinates():
+    return _stats_response(
+        "stats_coordinates",
+        coordinate_coverage,
+        "Fetched coordinate coverage.",
+    )
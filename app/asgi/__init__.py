@@ -0,0 +1,64 @@
+from contextlib import asynccontextmanager
+from os import environ as env
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Mount, Route
+
+from .. import create_app
+from .db import create_async_pool
+from .views import (
+    datatable,
+    gradske_cetvrti,
+    json_response,
+    zdenci_get,
+    zdenci_koordinate,
+    zdenci_list,
+    zdenci_statusi,
+)
+
+# Read endpoints served natively on the event loop. Requests for other methods
+# on these paths, and every other route, fall through to the Flask app.
+ASYNC_ROUTES = [
+    Route("/api/v1/zdenci", zdenci_list, methods=["GET"]),
+    Route("/api/v1/zdenci/statusi", zdenci_statusi, methods=["GET"]),
+    Route("/api/v1/zdenci/koordinate", zdenci_koordinate, methods=["GET"]),
+    Route("/api/v1/zdenci/{zdenac_id:int}", zdenci_get, methods=["GET"]),
+    Route("/api/v1/gradske-cetvrti", gradske_cetvrti, methods=["GET"]),
+    Route("/api/zdenci", datatable, methods=["GET"]),
+]
+
+
+async def _server_error(request, exc):
+    if request.url.path.startswith("/api/"):
+        return json_response(request, 500, "Unexpected server error.", {"detail": str(exc)})
+    return PlainTextResponse("Internal Server Error", status_code=500)
+
+
+# ASGI application: the hot read endpoints run on an async psycopg pool and
+# share their query plans with the Flask views; writes, snapshots, auth and the
+# UI keep running in Flask on a thread pool (ASGI_WSGI_THREADS).
+def create_asgi_app():
+    flask_app = create_app()
+    pool = create_async_pool()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await pool.open(wait=False)
+        try:
+            yield
+        finally:
+            await pool.close()
+
+    routes = ASYNC_ROUTES + [
+        Mount("/", WSGIMiddleware(flask_app, workers=int(env.get("ASGI_WSGI_THREADS", 10))))
+    ]
+    app = Starlette(
+        routes=routes,
+        lifespan=lifespan,
+        exception_handlers={Exception: _server_error},
+    )
+    app.state.flask_app = flask_app
+    app.state.pool = pool
+    return app
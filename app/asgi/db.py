@@ -0,0 +1,47 @@
+from os import environ as env
+
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+
+from ..data.db import db_settings
+from ..data.prepared import prepared_enabled
+
+
+# The ASGI views only read, so connections run in autocommit and skip the
+# BEGIN/COMMIT round trips. psycopg prepares statements itself: on first use
+# when DB_PREPARED_STATEMENTS is on, never when it is off.
+async def _configure(conn):
+    await conn.set_autocommit(True)
+    conn.prepare_threshold = 0 if prepared_enabled() else None
+    conn.prepared_max = int(env.get("DB_PREPARED_MAX", 256))
+
+
+# Async pool for the ASGI views, configured from the same DB_* variables as
+# the psycopg2 pool. Connections are held only while a query runs, so a small
+# pool serves many slow clients.
+def create_async_pool():
+    return AsyncConnectionPool(
+        make_conninfo(**db_settings()),
+        min_size=int(env.get("DB_POOL_MIN", 1)),
+        max_size=int(env.get("ASYNC_DB_POOL_MAX", 20)),
+        timeout=float(env.get("DB_POOL_TIMEOUT", 30)),
+        check=AsyncConnectionPool.check_connection,
+        configure=_configure,
+        open=False,
+    )
+
+
+async def fetch_rows_with_cols(cur, sql, params=()):
+    await cur.execute(sql, params)
+    rows = await cur.fetchall()
+    if not cur.description:
+        return rows, []
+    return rows, [column.name for column in cur.description]
+
+
+async def fetch_count(cur, sql, params=()):
+    await cur.execute(sql, params)
+    row = await cur.fetchone()
+    if not row:
+        return 0
+    return row[0]
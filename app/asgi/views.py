@@ -0,0 +1,239 @@
+from functools import wraps
+
+import psycopg
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import http_date, parse_date, parse_etags
+
+from ..api.api_response import envelope, negotiate_jsonld, wants_jsonld
+from ..api.conditional import cache_max_age, dataset_etag
+from ..compression import compression_enabled, encode_body
+from ..api.datatable_api import (
+    ESTIMATED_COUNT_SQL,
+    EXACT_COUNT_SQL,
+    TOTAL_COUNT_TTL,
+    datatable_payload,
+    plan_datatable,
+    split_filtered_count,
+    usable_estimate,
+)
+from ..api.rest_api import (
+    ZDENAC_BY_ID_SQL,
+    plan_zdenci_koordinate,
+    plan_zdenci_list,
+    zdenac_items,
+    zdenci_koordinate_payload,
+    zdenci_list_payload,
+)
+from ..data.cache import lookup_result, store_result
+from ..data.changes import last_changed_at
+from ..data.jsonld import add_jsonld_list
+from ..data.stats import (
+    DISTRICT_TOTALS_SQL,
+    STATS_TABLE_EXISTS_SQL,
+    STATUS_TOTALS_SQL,
+    stats_sql,
+)
+from .db import fetch_count, fetch_rows_with_cols
+
+
+def _vary():
+    return "Accept, Accept-Encoding" if compression_enabled() else "Accept"
+
+
+# Same encoder, formatting, JSON-LD negotiation and compression as
+# app.api.api_response.jsonld_response plus app.compression, via the app's
+# JSON provider.
+def _json(request, payload, status_code=200):
+    payload, headers = negotiate_jsonld(payload, wants_jsonld(request.headers.get("accept")))
+    body = request.app.state.flask_app.json.dumps_bytes(payload, separators=(",", ":")) + b"\n"
+    headers.setdefault("Content-Type", "application/json")
+    if status_code == 200:
+        headers["Vary"] = _vary()
+        body, encoding = encode_body(body, request.headers.get("accept-encoding"))
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+    return Response(body, status_code=status_code, headers=headers)
+
+
+def json_response(request, status_code, message, response=None):
+    return _json(request, envelope(status_code, message, response), status_code)
+
+
+def _args(request):
+    return MultiDict(request.query_params.multi_items())
+
+
+def _full_path(request):
+    return f"{request.scope['path']}?{request.scope['query_string'].decode('latin-1')}"
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return parse_etags(if_none_match).contains_weak(etag)
+    if_modified_since = parse_date(request.headers.get("if-modified-since"))
+    if if_modified_since is not None:
+        return int(last_modified) <= if_modified_since.timestamp()
+    return False
+
+
+# The dataset version is read from the database or Redis with blocking
+# clients, so these steps run in the thread pool instead of the event loop.
+def _validators(full_path, jsonld):
+    return dataset_etag(full_path, jsonld), last_changed_at()
+
+
+# Same cache as app.data.cache.cached_result; loader is a coroutine function.
+async def cached_result_async(name, params, loader, ttl=None):
+    key, hit, value = await run_in_threadpool(lookup_result, name, params, ttl)
+    if not hit:
+        value = await loader()
+        await run_in_threadpool(store_result, key, value, ttl)
+    return value
+
+
+# Async counterpart of app.api.conditional.conditional_get with the same
+# ETag, Last-Modified and Cache-Control values.
+def conditional_get(view):
+    @wraps(view)
+    async def wrapper(request):
+        etag, last_modified = await run_in_threadpool(
+            _validators, _full_path(request), wants_jsonld(request.headers.get("accept"))
+        )
+        if _not_modified(request, etag, last_modified):
+            response = Response(status_code=304, headers={"Vary": _vary()})
+        else:
+            response = await view(request)
+            if response.status_code != 200:
+                return response
+        max_age = cache_max_age()
+        weak = "W/" if "content-encoding" in response.headers else ""
+        response.headers["ETag"] = f'{weak}"{etag}"'
+        response.headers["Last-Modified"] = http_date(last_modified)
+        response.headers["Cache-Control"] = (
+            f"public, max-age={max_age}" if max_age > 0 else "public, no-cache"
+        )
+        return response
+
+    return wrapper
+
+
+def _invalid_query(request, exc):
+    return json_response(request, 400, "Invalid query parameters.", {"detail": str(exc)})
+
+
+def _database_error(request, exc):
+    return json_response(request, 500, "Database error.", {"detail": str(exc)})
+
+
+@conditional_get
+async def zdenci_list(request):
+    try:
+        plan = plan_zdenci_list(_args(request))
+    except ValueError as exc:
+        return _invalid_query(request, exc)
+
+    try:
+        async with request.app.state.pool.connection() as conn, conn.cursor() as cur:
+            total_count = None
+            if plan["count"]:
+                total_count = await fetch_count(cur, *plan["count"])
+            rows, cols = await fetch_rows_with_cols(cur, *plan["page"])
+    except psycopg.Error as exc:
+        return _database_error(request, exc)
+
+    data = zdenci_list_payload(plan, rows, cols, total_count)
+    return json_response(request, 200, "Fetched zdenac collection.", data)
+
+
+@conditional_get
+async def zdenci_get(request):
+    zdenac_id = request.path_params["zdenac_id"]
+    try:
+        async with request.app.state.pool.connection() as conn, conn.cursor() as cur:
+            rows, cols = await fetch_rows_with_cols(cur, ZDENAC_BY_ID_SQL, (zdenac_id,))
+    except psycopg.Error as exc:
+        return _database_error(request, exc)
+
+    if not rows:
+        return json_response(
+            request,
+            404,
+            f"Zdenac {zdenac_id} not found.",
+            {"detail": f"Zdenac {zdenac_id} does not exist."},
+        )
+    return json_response(request, 200, "Fetched zdenac.", zdenac_items(rows, cols)[0])
+
+
+@conditional_get
+async def zdenci_koordinate(request):
+    try:
+        plan = plan_zdenci_koordinate(_args(request))
+    except ValueError as exc:
+        return _invalid_query(request, exc)
+
+    try:
+        async with request.app.state.pool.connection() as conn, conn.cursor() as cur:
+            rows, cols = await fetch_rows_with_cols(cur, *plan["page"])
+    except psycopg.Error as exc:
+        return _database_error(request, exc)
+
+    data = zdenci_koordinate_payload(plan, rows, cols)
+    return json_response(request, 200, "Fetched coordinate list.", data)
+
+
+async def _stats_rows(request, template):
+    async with request.app.state.pool.connection() as conn, conn.cursor() as cur:
+        table_exists = await fetch_count(cur, STATS_TABLE_EXISTS_SQL)
+        rows, cols = await fetch_rows_with_cols(cur, stats_sql(template, table_exists))
+    return [dict(zip(cols, row)) for row in rows]
+
+
+@conditional_get
+async def zdenci_statusi(request):
+    async def load():
+        return add_jsonld_list(await _stats_rows(request, STATUS_TOTALS_SQL))
+
+    try:
+        data = await cached_result_async("statusi", {}, load)
+    except psycopg.Error as exc:
+        return _database_error(request, exc)
+
+    return json_response(request, 200, "Fetched status summary.", {"items": data})
+
+
+@conditional_get
+async def gradske_cetvrti(request):
+    try:
+        data = await cached_result_async(
+            "gradske_cetvrti", {}, lambda: _stats_rows(request, DISTRICT_TOTALS_SQL)
+        )
+    except psycopg.Error as exc:
+        return _database_error(request, exc)
+
+    return json_response(request, 200, "Fetched city districts.", {"items": data})
+
+
+async def datatable(request):
+    plan = plan_datatable(_args(request))
+    async with request.app.state.pool.connection() as conn, conn.cursor() as cur:
+
+        async def load_total():
+            total_count = None
+            if plan["count_mode"] == "estimated":
+                total_count = usable_estimate(await fetch_count(cur, ESTIMATED_COUNT_SQL))
+            if total_count is None:
+                total_count = await fetch_count(cur, EXACT_COUNT_SQL)
+            return total_count
+
+        total_count = await cached_result_async(
+            "datatable_total", {"mode": plan["count_mode"]}, load_total, ttl=TOTAL_COUNT_TTL
+        )
+        rows, cols = await fetch_rows_with_cols(cur, *plan["page"])
+        rows, cols, filtered_count = split_filtered_count(plan, rows, cols, total_count)
+        if filtered_count is None:
+            filtered_count = await fetch_count(cur, *plan["count"])
+
+    return _json(request, datatable_payload(plan, rows, cols, total_count, filtered_count))
@@ -1,22 +1,17 @@
 import json
 from functools import wraps
 from os import environ as env
-from pathlib import Path
 
 from authlib.integrations.flask_client import OAuth
 from dotenv import find_dotenv, load_dotenv
 from flask import abort, flash, redirect, render_template, session, url_for
 
 from .blueprint import main
-from .data.snapshots import (
-    build_csv_payload,
-    build_grouped_json_payload,
-    fetch_zdenci_data,
-)
+from .data.db import pooled_connection
+from .data.snapshot_store import refresh_snapshots as refresh_snapshot_files
+from .jobs import submit_job
 
-SNAPSHOT_DIR = Path(__file__).resolve().parent / "static" / "data"
-CSV_SNAPSHOT_PATH = SNAPSHOT_DIR / "zdenci.csv"
-JSON_SNAPSHOT_PATH = SNAPSHOT_DIR / "zdenci.json"
+SNAPSHOT_JOB_KEY = "refresh-snapshots"
 
 
 def _login_required(func):
@@ -29,19 +24,14 @@ def _login_required(func):
     return wrapper
 
 
-def _write_snapshot(path, payload):
-    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
-    temp_path = path.with_name(path.name + ".tmp")
-    temp_path.write_text(payload, encoding="utf-8")
-    temp_path.replace(path)
+def _refresh_snapshots(progress=None):
+    with pooled_connection() as conn:
+        return refresh_snapshot_files(conn, progress=progress)
 
 
-def _refresh_snapshots():
-    data = fetch_zdenci_data(order_clause=" ORDER BY g.naziv_gc ASC, z.lokacija ASC")
-    csv_payload = build_csv_payload(data)
-    _write_snapshot(CSV_SNAPSHOT_PATH, csv_payload)
-    json_payload = build_grouped_json_payload(data)
-    _write_snapshot(JSON_SNAPSHOT_PATH, json_payload)
+# Queue a refresh in the background; a refresh already in flight is reused.
+def start_snapshot_refresh():
+    return submit_job(SNAPSHOT_JOB_KEY, _refresh_snapshots)
 
 
 def _init_auth0(app):
@@ -93,6 +83,9 @@ def _init_auth0(app):
     @main.route("/refresh-snapshots")
     @_login_required
     def refresh_snapshots():
-        _refresh_snapshots()
-        flash("Preslike su uspješno osvježene.", "success")
+        _, started = start_snapshot_refresh()
+        if started:
+            flash("Osvježavanje preslika je pokrenuto u pozadini.", "success")
+        else:
+            flash("Osvježavanje preslika je već u tijeku.", "info")
         return redirect(url_for("main.index"))
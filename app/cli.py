@@ -0,0 +1,117 @@
+import click
+import psycopg2
+from flask.cli import with_appcontext
+from werkzeug.datastructures import MultiDict
+
+from .api.datatable_api import plan_datatable
+from .api.rest_api import plan_zdenci_list
+from .data.changes import notify_change
+from .data.db import pooled_connection
+from .data.importer import (
+    IMPORT_FORMATS,
+    IMPORT_MODES,
+    ImportValidationError,
+    guess_import_format,
+    import_zdenci,
+)
+from .data.migrate import (
+    applied_migrations,
+    connect_for_migrations,
+    list_migrations,
+    migrate,
+    plan_indexes,
+)
+
+# Hot queries and the index each one must be able to use: (label, plan
+# function, request arguments, plan entry, index name). Filter values are
+# selective ones; for a value most rows share, reading zdenac_pkey in id order
+# is the better plan.
+QUERY_PLAN_CHECKS = [
+    ("zdenci by district", plan_zdenci_list, {"naziv_gc_id": "1"}, "page", "zdenac_naziv_gc_id_idx"),
+    ("zdenci by district, count", plan_zdenci_list, {"naziv_gc_id": "1"}, "count", "zdenac_naziv_gc_id_idx"),
+    ("zdenci by status", plan_zdenci_list, {"status_odrz": "nije u funkciji"}, "page", "zdenac_status_odrz_lower_idx"),
+    ("zdenci by status, count", plan_zdenci_list, {"status_odrz": "nije u funkciji"}, "count", "zdenac_status_odrz_lower_idx"),
+    ("zdenci by activity", plan_zdenci_list, {"aktivan_da_ne": "ne"}, "page", "zdenac_aktivan_da_ne_lower_idx"),
+    ("zdenci search", plan_zdenci_list, {"search": "trg"}, "count", "zdenac_search_doc_trgm_idx"),
+    ("datatable default order", plan_datatable, {"start": "0", "length": "10"}, "page", "zdenac_lokacija_idx"),
+]
+
+
+@click.command("import-zdenci", help="Import zdenci from a CSV or GeoJSON file.")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(sorted(IMPORT_FORMATS)))
+@click.option("--mode", type=click.Choice(sorted(IMPORT_MODES)), default="upsert", show_default=True)
+@with_appcontext
+def import_zdenci_command(path, fmt, mode):
+    fmt = fmt or guess_import_format(path)
+    if fmt is None:
+        raise click.UsageError("Cannot tell the format from the file name; use --format.")
+
+    with open(path, encoding="utf-8-sig", newline="") as handle, pooled_connection() as conn:
+        try:
+            report = import_zdenci(conn, handle, fmt, mode)
+        except ImportValidationError as exc:
+            for error in exc.errors:
+                click.echo(f"line {error['line']}: {' '.join(error['errors'])}", err=True)
+            raise click.ClickException(f"Import rejected: {exc}")
+
+    notify_change()
+    click.echo(
+        f"{report['rows']} rows: {report['inserted']} inserted, "
+        f"{report['updated']} updated, {report['deleted']} deleted."
+    )
+
+
+@click.command("migrate-db", help="Apply pending schema migrations from app/migrations.")
+@click.option("--list", "list_only", is_flag=True, help="Only show applied and pending migrations.")
+@with_appcontext
+def migrate_db_command(list_only):
+    conn = connect_for_migrations()
+    try:
+        if list_only:
+            applied = applied_migrations(conn)
+            for migration in list_migrations():
+                entry = applied.get(migration["version"])
+                if entry is None:
+                    state = "pending"
+                elif entry["checksum"] != migration["checksum"]:
+                    state = f"applied {entry['applied_at']:%Y-%m-%d %H:%M} (file changed since)"
+                else:
+                    state = f"applied {entry['applied_at']:%Y-%m-%d %H:%M}"
+                click.echo(f"{migration['path'].name}: {state}")
+            return
+
+        def report(migration):
+            click.echo(f"Applying {migration['path'].name}")
+
+        try:
+            applied = migrate(conn, progress=report)
+        except psycopg2.Error as exc:
+            raise click.ClickException(f"Migration failed: {exc}")
+    finally:
+        conn.close()
+    click.echo(f"{len(applied)} migration(s) applied.")
+
+
+@click.command("check-query-plans", help="EXPLAIN the hot queries and check they use their indexes.")
+@with_appcontext
+def check_query_plans_command():
+    failed = 0
+    with pooled_connection() as conn:
+        for label, plan_query, args, entry, index in QUERY_PLAN_CHECKS:
+            sql, params = plan_query(MultiDict(args))[entry]
+            indexes = plan_indexes(conn, sql, params)
+            if index in indexes:
+                click.echo(f"ok    {label}: {index}")
+            else:
+                failed += 1
+                used = ", ".join(sorted(indexes)) or "no index"
+                click.echo(f"FAIL  {label}: expected {index}, plan uses {used}")
+    if failed:
+        raise click.ClickException(f"{failed} query plan(s) do not use their index; run migrate-db.")
+
+
+def init_cli(app):
+    app.cli.add_command(import_zdenci_command)
+    app.cli.add_command(migrate_db_command)
+    app.cli.add_command(check_query_plans_command)
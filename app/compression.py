@@ -0,0 +1,136 @@
+import gzip
+import zlib
+from os import environ as env
+
+from flask import request
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Only API and snapshot types: HTML pages that reflect user input next to
+# session or CSRF data would be open to BREACH if compressed per request.
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/ld+json",
+    "application/geo+json",
+    "text/csv",
+}
+COMPRESS_MIN_SIZE = int(env.get("COMPRESS_MIN_SIZE", 500))
+# Fast settings for per-request compression, the strongest ones for files
+# compressed once when the snapshots are written.
+GZIP_LEVEL = int(env.get("COMPRESS_GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(env.get("COMPRESS_BROTLI_QUALITY", 4))
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def compression_enabled():
+    return env.get("RESPONSE_COMPRESSION", "1") != "0"
+
+
+def available_encodings():
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+# Best content coding the client accepts; brotli wins ties.
+def choose_encoding(accept_encoding):
+    if not accept_encoding or not compression_enabled():
+        return None
+    accept = parse_accept_header(accept_encoding)
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = accept[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, static=False):
+    if encoding == "br":
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0)
+
+
+# Compressed chunks of a stream of byte chunks, in bounded memory. The gzip
+# stream has a zero mtime, like compress().
+def iter_compress(chunks, encoding, static=False):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(
+            STATIC_GZIP_LEVEL if static else GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16
+        )
+        process, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def variant_path(path, encoding):
+    return path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+
+
+# (body, encoding) for a response body; encoding is None when the body is
+# sent as is.
+def encode_body(body, accept_encoding):
+    if len(body) < COMPRESS_MIN_SIZE:
+        return body, None
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return body, None
+    return compress(body, encoding), encoding
+
+
+# The precompressed sibling of path (written with the snapshots) for the
+# client's Accept-Encoding, unless it is missing or older than path.
+def precompressed_variant(path, accept_encoding):
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return path, None
+    variant = variant_path(path, encoding)
+    try:
+        if variant.stat().st_mtime >= path.stat().st_mtime:
+            return variant, encoding
+    except OSError:
+        pass
+    return path, None
+
+
+def _compress_response(response):
+    if not compression_enabled():
+        return response
+    if response.status_code == 304:
+        response.vary.add("Accept-Encoding")
+        return response
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body, encoding = encode_body(response.get_data(), request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    # The compressed bytes differ from the identity ones; a weak validator
+    # still matches If-None-Match for either.
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    app.after_request(_compress_response)
@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from os import environ as env
+
+from .changes import current_version, on_change
+from .shared import get_shared_backend
+
+
+# In-process TTL + LRU cache bounded to maxsize entries.
+class TTLCache:
+    def __init__(self, maxsize=512, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] <= now:
+                if item is not None:
+                    del self._data[key]
+                self._counters["misses"] += 1
+                return False, None
+            self._data.move_to_end(key)
+            self._counters["hits"] += 1
+            return True, item[0]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._data), "max_size": self.maxsize, **self._counters}
+
+
+_lock = threading.Lock()
+_result_cache = None
+
+
+def get_result_cache():
+    global _result_cache
+    if _result_cache is None:
+        with _lock:
+            if _result_cache is None:
+                _result_cache = TTLCache(
+                    maxsize=int(env.get("CACHE_MAX_ENTRIES", 512)),
+                    ttl=float(env.get("CACHE_TTL", 60)),
+                )
+    return _result_cache
+
+
+@on_change
+def _invalidate_local():
+    get_result_cache().clear()
+
+
+def _result_key(name, params):
+    return f"{name}:{json.dumps(params, sort_keys=True, default=str)}:{current_version()}"
+
+
+# First half of a read-through: the entry's key (tied to the current dataset
+# version), whether it was found, and its value. A miss is filled with
+# store_result under the same key, so a write in between cannot cache a
+# stale value under the new version. Both calls block on the shared backend.
+def lookup_result(name, params, ttl=None):
+    key = _result_key(name, params)
+    cache = get_result_cache()
+    hit, value = cache.get(key)
+    if hit:
+        return key, True, value
+
+    backend = get_shared_backend()
+    if backend is not None:
+        hit, value = backend.get(key)
+        if hit:
+            cache.set(key, value, ttl)
+            return key, True, value
+    return key, False, None
+
+
+def store_result(key, value, ttl=None):
+    cache = get_result_cache()
+    ttl = cache.ttl if ttl is None else ttl
+    cache.set(key, value, ttl)
+    backend = get_shared_backend()
+    if backend is not None:
+        backend.set(key, value, ttl)
+
+
+# Read-through cache keyed by query name, parameters and dataset version, so
+# any committed write makes earlier entries unreachable. Values must be
+# JSON-serialisable when the shared backend is enabled.
+def cached_result(name, params, loader, ttl=None):
+    key, hit, value = lookup_result(name, params, ttl)
+    if not hit:
+        value = loader()
+        store_result(key, value, ttl)
+    return value
@@ -0,0 +1,122 @@
+import logging
+import os
+import threading
+import time
+from os import environ as env
+from uuid import uuid4
+
+import psycopg2
+
+from .shared import get_shared_backend
+
+logger = logging.getLogger(__name__)
+
+# dataset_version (app/migrations/0006_dataset_version.sql) is bumped by
+# triggers on every write, so it is the same for all processes and also
+# covers writes from the import CLI or psql. It is re-read at most every
+# DATASET_VERSION_TTL seconds; this process's own writes re-read it at once.
+# A missing table is remembered for the life of the process, so without the
+# migration versions never touch the database; restart after migrating.
+DATASET_VERSION_TTL = float(env.get("DATASET_VERSION_TTL", 1))
+DATASET_VERSION_EXISTS_SQL = "SELECT to_regclass('public.dataset_version') IS NOT NULL"
+DATASET_VERSION_SQL = "SELECT version, changed_at FROM dataset_version"
+
+# Without the migration or a shared backend versions are counted per process;
+# the tag keeps versions from different processes from being mistaken for
+# each other.
+_PROCESS_TAG = uuid4().hex[:12]
+
+_lock = threading.Lock()
+_state = {"version": 0, "changed_at": time.time()}
+_db_state = {"value": None, "read_at": None, "missing": False}
+_listeners = []
+
+
+# Forked workers count their own writes, so each needs its own tag.
+def _reset_after_fork():
+    global _PROCESS_TAG, _lock
+    _PROCESS_TAG = uuid4().hex[:12]
+    _lock = threading.Lock()
+    _db_state["read_at"] = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# db imports the statement cache, which imports this module.
+def _read_db_version():
+    from .db import pooled_connection
+
+    try:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(DATASET_VERSION_EXISTS_SQL)
+                if not cur.fetchone()[0]:
+                    _db_state["missing"] = True
+                    return None
+                cur.execute(DATASET_VERSION_SQL)
+                return cur.fetchone()
+            finally:
+                cur.close()
+                conn.rollback()
+    except psycopg2.Error as exc:
+        logger.warning("Reading the dataset version failed: %s", exc)
+        return None
+
+
+def _db_version():
+    if _db_state["missing"]:
+        return None
+    now = time.monotonic()
+    with _lock:
+        read_at = _db_state["read_at"]
+        if read_at is not None and now - read_at < DATASET_VERSION_TTL:
+            return _db_state["value"]
+    value = _read_db_version()
+    with _lock:
+        _db_state["value"] = value
+        _db_state["read_at"] = now
+    return value
+
+
+def dataset_state():
+    database = _db_version()
+    if database is not None:
+        version, changed_at = database
+        return "db", version, changed_at
+    backend = get_shared_backend()
+    if backend is not None:
+        shared = backend.get_version()
+        if shared is not None:
+            version, changed_at = shared
+            return "shared", version, changed_at or _state["changed_at"]
+    return _PROCESS_TAG, _state["version"], _state["changed_at"]
+
+
+# Dataset version, bumped after every committed write.
+def current_version():
+    scope, version, _ = dataset_state()
+    return f"{scope}:{version}"
+
+
+def last_changed_at():
+    return dataset_state()[2]
+
+
+def on_change(callback):
+    _listeners.append(callback)
+    return callback
+
+
+def notify_change():
+    with _lock:
+        _state["version"] += 1
+        _state["changed_at"] = time.time()
+        changed_at = _state["changed_at"]
+        _db_state["read_at"] = None
+    backend = get_shared_backend()
+    if backend is not None:
+        backend.bump_version(changed_at)
+    for callback in list(_listeners):
+        callback()
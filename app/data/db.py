@@ -1,8 +1,144 @@
+import logging
+import os
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from os import environ as env
+from uuid import uuid4
+
 import psycopg2
+from flask import g
+
+from .pool import ConnectionPool
+from .prepared import PreparedConnection
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+_forked_pools = []
+
+
+# Connection settings are read from the environment on first use.
+def db_settings():
+    settings = {
+        "dbname": env.get("DB_NAME", "zdenci"),
+        "user": env.get("DB_USER", "postgres"),
+        "host": env.get("DB_HOST", "localhost"),
+        "port": int(env.get("DB_PORT", 5432)),
+        "connect_timeout": int(env.get("DB_CONNECT_TIMEOUT", 5)),
+        "application_name": env.get("DB_APPLICATION_NAME", "zdenci"),
+    }
+    if env.get("DB_PASSWORD") is not None:
+        settings["password"] = env.get("DB_PASSWORD")
+    statement_timeout = int(env.get("DB_STATEMENT_TIMEOUT_MS", 30000))
+    if statement_timeout > 0:
+        settings["options"] = f"-c statement_timeout={statement_timeout}"
+    return settings
+
+
+def _connect():
+    return psycopg2.connect(connection_factory=PreparedConnection, **db_settings())
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _connect,
+                    minconn=int(env.get("DB_POOL_MIN", 1)),
+                    maxconn=int(env.get("DB_POOL_MAX", 10)),
+                    timeout=float(env.get("DB_POOL_TIMEOUT", 30)),
+                    health_check_interval=float(
+                        env.get("DB_POOL_HEALTH_CHECK_INTERVAL", 30)
+                    ),
+                )
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.closeall()
+
+
+# A forked child must not use or close the parent's connections: the sockets
+# are shared, and closing them would end the parent's sessions. The inherited
+# pool is kept referenced (never garbage collected) and a new one is opened
+# lazily in the child.
+def _reset_pool_after_fork():
+    global _pool, _pool_lock
+    if _pool is not None:
+        _forked_pools.append(_pool)
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+def _warm_pool():
+    try:
+        get_pool().fill()
+    except psycopg2.Error as exc:
+        logger.warning("Database pool warm-up failed: %s", exc)
 
-conn = psycopg2.connect(
-    dbname="zdenci", user="postgres", password="123", host="localhost"
-)
+
+# Open the minimum number of connections without blocking startup.
+def warm_pool_async():
+    thread = threading.Thread(target=_warm_pool, name="db-pool-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def check_ready(timeout=None):
+    if timeout is None:
+        timeout = float(env.get("DB_READY_TIMEOUT", 2))
+    pool = get_pool()
+    conn = pool.getconn(timeout=timeout)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.close()
+        conn.rollback()
+    finally:
+        pool.putconn(conn)
+
+
+# Connection checked out for the current request, returned on teardown.
+def get_conn():
+    conn = g.get("db_conn")
+    if conn is None:
+        conn = get_pool().getconn()
+        g.db_conn = conn
+    return conn
+
+
+def release_conn(exc=None):
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        get_pool().putconn(conn)
+
+
+# Connection for work running outside a request (CLI, background threads).
+@contextmanager
+def pooled_connection():
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+def init_db(app):
+    app.teardown_appcontext(release_conn)
+    if env.get("DB_POOL_WARM", "1") != "0":
+        warm_pool_async()
 
 
 # Safely read a single COUNT(*) result.
@@ -28,3 +164,37 @@ def fetch_row_with_cols(cur):
         return None, []
     cols = [desc[0] for desc in cur.description]
     return row, cols
+
+
+ROW_MODES = {"dict", "tuple", "namedtuple"}
+
+
+# Lazily stream a query through a server-side (named) cursor, itersize rows per
+# round trip. Rows are dicts by default; "tuple" yields the raw rows and
+# "namedtuple" builds one row class per query instead of a dict per row.
+def iter_query(conn, sql, params=None, row_mode="dict", itersize=None):
+    if row_mode not in ROW_MODES:
+        raise ValueError(f"row_mode must be one of: {', '.join(sorted(ROW_MODES))}.")
+    if itersize is None:
+        itersize = int(env.get("DB_FETCH_ITERSIZE", 2000))
+
+    cur = conn.cursor(name=f"iter_{uuid4().hex}")
+    cur.itersize = itersize
+    try:
+        cur.execute(sql, params or [])
+        if row_mode == "tuple":
+            yield from cur
+            return
+
+        make_row = None
+        for row in cur:
+            if make_row is None:
+                cols = [desc[0] for desc in cur.description]
+                if row_mode == "namedtuple":
+                    make_row = namedtuple("Row", cols)._make
+                else:
+                    make_row = lambda values, cols=cols: dict(zip(cols, values))
+            yield make_row(row)
+    finally:
+        if not cur.closed and not conn.closed:
+            cur.close()
@@ -0,0 +1,350 @@
+import csv
+import io
+import json
+
+import psycopg2
+
+from .search import fold_diacritics
+from .snapshots import STREAM_CHUNK_SIZE
+from .zdenci_constants import REST_PAYLOAD_FIELDS
+
+IMPORT_FORMATS = {"csv", "geojson"}
+IMPORT_MODES = {"upsert", "replace"}
+IMPORT_MAX_ERRORS = 100
+IMPORT_FIELDS = list(REST_PAYLOAD_FIELDS)
+IMPORT_SQL_TYPES = {"text": "text", "int": "integer", "num": "numeric"}
+# Staging columns after the payload fields: the record's position in the file
+# and the columns it supplies.
+STAGING_FIELDS = IMPORT_FIELDS + ["line", "supplied"]
+
+
+class ImportValidationError(ValueError):
+    def __init__(self, errors, rows):
+        super().__init__(f"{len(errors)} invalid rows.")
+        self.errors = errors
+        self.rows = rows
+
+
+# File-like adapter so COPY ... FROM STDIN pulls CSV text from a generator.
+class _ChunkReader:
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = ""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, ""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _district_key(name):
+    return fold_diacritics(name.strip())
+
+
+def _load_districts(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT id, naziv_gc FROM gradska_cetvrt")
+    districts = {_district_key(name): gc_id for gc_id, name in cur.fetchall() if name}
+    cur.close()
+    return districts
+
+
+# The header (or the whole GeoJSON document) is checked before COPY starts.
+def _csv_records(stream):
+    reader = csv.DictReader(stream)
+    unknown = [
+        name for name in reader.fieldnames or []
+        if name not in REST_PAYLOAD_FIELDS and name != "naziv_gc"
+    ]
+    if unknown:
+        raise ImportValidationError([{"line": 1, "errors": [f"Unknown columns: {', '.join(unknown)}."]}], 0)
+    return ((reader.line_num, record) for record in reader)
+
+
+def _geojson_records(stream):
+    try:
+        collection = json.load(stream)
+    except ValueError as exc:
+        raise ImportValidationError([{"line": None, "errors": [f"Invalid JSON: {exc}"]}], 0)
+    if not isinstance(collection, dict) or collection.get("type") != "FeatureCollection":
+        collection = {}
+    features = collection.get("features")
+    if not isinstance(features, list):
+        raise ImportValidationError([{"line": None, "errors": ["Expected a GeoJSON FeatureCollection."]}], 0)
+    return _iter_features(features)
+
+
+def _iter_features(features):
+    for index, feature in enumerate(features):
+        if not isinstance(feature, dict):
+            yield index, None
+            continue
+        record = dict(feature.get("properties") or {})
+        if "id" not in record and feature.get("id") is not None:
+            record["id"] = feature["id"]
+        geometry = feature.get("geometry") or {}
+        coordinates = geometry.get("coordinates")
+        if geometry.get("type") == "Point" and isinstance(coordinates, list) and len(coordinates) >= 2:
+            record["lon"], record["lat"] = coordinates[0], coordinates[1]
+        yield index, record
+
+
+# Same coercion rules as the REST payloads: blanks become NULL, text is stripped.
+def _coerce_record(record, districts, district_ids):
+    if not isinstance(record, dict):
+        return None, ["Feature must be an object."]
+    errors = []
+    unknown = [key for key in record if key not in REST_PAYLOAD_FIELDS and key != "naziv_gc"]
+    if unknown:
+        errors.append(f"Unknown fields: {', '.join(sorted(unknown))}.")
+
+    row = {}
+    for key, field_type in REST_PAYLOAD_FIELDS.items():
+        if key not in record:
+            continue
+        value = record[key]
+        if value is None or (isinstance(value, str) and not value.strip()):
+            row[key] = None
+        elif field_type == "text":
+            row[key] = value.strip() if isinstance(value, str) else str(value)
+        elif field_type == "int":
+            try:
+                row[key] = int(value)
+            except (TypeError, ValueError):
+                errors.append(f"{key} must be an integer.")
+        else:
+            try:
+                row[key] = float(value)
+            except (TypeError, ValueError):
+                errors.append(f"{key} must be a number.")
+
+    # naziv_gc (the district name, as in the CSV export) is used unless an id is given.
+    name = record.get("naziv_gc")
+    if row.get("naziv_gc_id") is not None:
+        if row["naziv_gc_id"] not in district_ids:
+            errors.append("naziv_gc_id does not exist.")
+    elif isinstance(name, str) and name.strip():
+        row["naziv_gc_id"] = districts.get(_district_key(name))
+        if row["naziv_gc_id"] is None:
+            errors.append(f"Unknown naziv_gc: {name.strip()}.")
+    elif "naziv_gc" in record:
+        row["naziv_gc_id"] = None
+
+    # A record with an id may leave lokacija out to keep the stored value;
+    # records without one need it to be matched or inserted.
+    if ("lokacija" in row or row.get("id") is None) and not row.get("lokacija"):
+        errors.append("lokacija is required.")
+    return row, errors
+
+
+class _Validator:
+    def __init__(self, records, districts):
+        self.records = records
+        self.districts = districts
+        self.district_ids = set(districts.values())
+        self.errors = []
+        self.rows = 0
+        self.max_id = None
+        self._ids = set()
+
+    # Valid rows as CSV lines for COPY; invalid rows are collected instead.
+    def __iter__(self):
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        for line, record in self.records:
+            self.rows += 1
+            row, errors = _coerce_record(record, self.districts, self.district_ids)
+            zdenac_id = row.get("id") if row else None
+            if zdenac_id is not None:
+                if zdenac_id in self._ids:
+                    errors.append(f"Duplicate id {zdenac_id}.")
+                self._ids.add(zdenac_id)
+            if errors:
+                if len(self.errors) < IMPORT_MAX_ERRORS:
+                    self.errors.append({"line": line, "errors": errors})
+                continue
+            if self.errors:
+                continue
+
+            if zdenac_id is not None and (self.max_id is None or zdenac_id > self.max_id):
+                self.max_id = zdenac_id
+            supplied = [key for key in IMPORT_FIELDS if key in row and key != "id"]
+            output.seek(0)
+            output.truncate(0)
+            writer.writerow(
+                ["" if row.get(key) is None else row[key] for key in IMPORT_FIELDS]
+                + [line, "{" + ",".join(supplied) + "}"]
+            )
+            yield output.getvalue()
+
+
+def _create_staging_table(cur):
+    columns = ", ".join(
+        f"{key} {IMPORT_SQL_TYPES[field_type]}" for key, field_type in REST_PAYLOAD_FIELDS.items()
+    )
+    cur.execute(
+        f"CREATE TEMP TABLE zdenac_import ({columns}, line bigint, supplied text[]) ON COMMIT DROP"
+    )
+
+
+# Records whose id is not in the table are inserted, so they must supply
+# lokacija even though updates may leave it out.
+NEW_WITHOUT_LOKACIJA_SQL = """
+SELECT line, id FROM zdenac_import i
+WHERE i.id IS NOT NULL AND NOT ('lokacija' = ANY(i.supplied))
+  AND NOT EXISTS (SELECT 1 FROM zdenac z WHERE z.id = i.id)
+ORDER BY line
+LIMIT %s
+"""
+
+
+def _check_new_rows(cur, rows):
+    cur.execute(NEW_WITHOUT_LOKACIJA_SQL, (IMPORT_MAX_ERRORS,))
+    errors = [
+        {"line": line, "errors": [f"lokacija is required for new zdenac {zdenac_id}."]}
+        for line, zdenac_id in cur.fetchall()
+    ]
+    if errors:
+        raise ImportValidationError(errors, rows)
+
+
+# Records without an id (such as the CSV export) are matched to existing
+# zdenci by lokacija (stripped, as imported values are) and district, or by
+# lokacija alone when the record does not name a district. Zdenci that share the key are paired in order: the
+# n-th such record in the file with the n-th such zdenac by id, which is the
+# export's order, so re-importing an export keeps every id. Zdenci claimed by
+# an id in the file are not matched again.
+MATCH_SQL = """
+UPDATE zdenac_import i SET id = m.id
+FROM (
+    SELECT f.line, e.id
+    FROM (
+        SELECT line, lokacija, naziv_gc_id,
+               row_number() OVER (PARTITION BY lokacija{partition} ORDER BY line) AS n
+        FROM zdenac_import
+        WHERE id IS NULL AND ('naziv_gc_id' = ANY(supplied)) = %s
+    ) f
+    JOIN (
+        SELECT id, btrim(lokacija) AS lokacija, naziv_gc_id,
+               row_number() OVER (PARTITION BY btrim(lokacija){partition} ORDER BY id) AS n
+        FROM zdenac z
+        WHERE NOT EXISTS (SELECT 1 FROM zdenac_import c WHERE c.id = z.id)
+    ) e ON e.lokacija = f.lokacija{condition} AND e.n = f.n
+) m
+WHERE i.line = m.line
+"""
+
+
+def _match_existing(cur):
+    cur.execute(
+        MATCH_SQL.format(
+            partition=", naziv_gc_id",
+            condition=" AND e.naziv_gc_id IS NOT DISTINCT FROM f.naziv_gc_id",
+        ),
+        (True,),
+    )
+    cur.execute(MATCH_SQL.format(partition="", condition=""), (False,))
+
+
+# One UPDATE and one INSERT per distinct set of supplied columns, so a column
+# a record leaves out keeps its stored value (or default) instead of NULL.
+def _apply(cur):
+    cur.execute("SELECT DISTINCT supplied FROM zdenac_import")
+    column_sets = [row[0] for row in cur.fetchall()]
+    inserted = updated = 0
+    for supplied in column_sets:
+        columns = [key for key in IMPORT_FIELDS if key in supplied]
+        cur.execute(
+            f"""
+            UPDATE zdenac z SET {", ".join(f"{key} = i.{key}" for key in columns)}
+            FROM zdenac_import i
+            WHERE z.id = i.id AND i.supplied = %s::text[]
+            """,
+            (supplied,),
+        )
+        updated += cur.rowcount
+        cur.execute(
+            f"""
+            INSERT INTO zdenac (id, {", ".join(columns)})
+            SELECT COALESCE(i.id, nextval(pg_get_serial_sequence('zdenac', 'id'))),
+                   {", ".join(f"i.{key}" for key in columns)}
+            FROM zdenac_import i
+            WHERE i.supplied = %s::text[]
+              AND NOT EXISTS (SELECT 1 FROM zdenac z WHERE z.id = i.id)
+            """,
+            (supplied,),
+        )
+        inserted += cur.rowcount
+    return inserted, updated
+
+
+# Stream records through validation into COPY, then apply them in one
+# transaction. Nothing is written unless every row is valid. mode=replace
+# deletes zdenci that are not in the file (after matching records without
+# an id).
+def import_zdenci(conn, stream, fmt, mode="upsert"):
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(sorted(IMPORT_FORMATS))}.")
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(sorted(IMPORT_MODES))}.")
+
+    records = _csv_records(stream) if fmt == "csv" else _geojson_records(stream)
+    cur = conn.cursor()
+    try:
+        validator = _Validator(records, _load_districts(conn))
+        _create_staging_table(cur)
+        cur.copy_expert(
+            f"COPY zdenac_import ({', '.join(STAGING_FIELDS)}) FROM STDIN WITH (FORMAT csv)",
+            _ChunkReader(iter(validator)),
+            size=STREAM_CHUNK_SIZE,
+        )
+        if validator.errors:
+            raise ImportValidationError(validator.errors, validator.rows)
+
+        _check_new_rows(cur, validator.rows)
+        _match_existing(cur)
+        deleted = 0
+        if mode == "replace":
+            cur.execute(
+                "DELETE FROM zdenac z WHERE NOT EXISTS "
+                "(SELECT 1 FROM zdenac_import i WHERE i.id = z.id)"
+            )
+            deleted = cur.rowcount
+        # Move the sequence past the ids in the file before it numbers new rows.
+        if validator.max_id is not None:
+            cur.execute(
+                "SELECT setval(pg_get_serial_sequence('zdenac', 'id'), "
+                "GREATEST(%s, nextval(pg_get_serial_sequence('zdenac', 'id'))))",
+                (validator.max_id,),
+            )
+        inserted, updated = _apply(cur)
+        conn.commit()
+    except (psycopg2.Error, ValueError):
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+    return {
+        "mode": mode,
+        "rows": validator.rows,
+        "inserted": inserted,
+        "updated": updated,
+        "deleted": deleted,
+    }
+
+
+def guess_import_format(filename=None, content_type=None):
+    name = (filename or "").lower()
+    if name.endswith((".geojson", ".json")) or content_type in ("application/geo+json", "application/json"):
+        return "geojson"
+    if name.endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return "csv"
+    return None
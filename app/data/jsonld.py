@@ -1,3 +1,5 @@
+from os import environ as env
+
 JSONLD_CONTEXT = {
     "@vocab": "https://schema.org/",
     "lokacija": "address",
@@ -5,20 +7,41 @@ JSONLD_CONTEXT = {
     "lon": "longitude",
 }
 JSONLD_TYPE = "https://schema.org/Place"
+JSONLD_CONTEXT_URL = "/context.jsonld"
+JSONLD_CONTEXT_MODES = {"embedded", "shared"}
+
+
+# embedded: every item carries the full @context (the original format).
+# shared: items only carry @type; the context is sent once per response, as a
+# top-level @context for application/ld+json or a Link header otherwise.
+def get_jsonld_mode():
+    mode = env.get("JSONLD_CONTEXT_MODE", "embedded").strip().lower()
+    return mode if mode in JSONLD_CONTEXT_MODES else "embedded"
 
 
+# Items are freshly built row dicts, so they are annotated in place.
 def add_jsonld(item):
     if not isinstance(item, dict):
         return item
 
-    enriched = dict(item)
-    enriched["@context"] = JSONLD_CONTEXT
-    enriched["@type"] = JSONLD_TYPE
+    if get_jsonld_mode() == "embedded":
+        item["@context"] = JSONLD_CONTEXT
+    item["@type"] = JSONLD_TYPE
 
-    return enriched
+    return item
 
 
 def add_jsonld_list(items):
     if not items:
         return []
-    return [add_jsonld(item) for item in items]
+    embedded = get_jsonld_mode() == "embedded"
+    for item in items:
+        if isinstance(item, dict):
+            if embedded:
+                item["@context"] = JSONLD_CONTEXT
+            item["@type"] = JSONLD_TYPE
+    return items
+
+
+def jsonld_link_header():
+    return f'<{JSONLD_CONTEXT_URL}>; rel="http://www.w3.org/ns/json-ld#context"; type="application/ld+json"'
@@ -0,0 +1,118 @@
+import hashlib
+import re
+from pathlib import Path
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from .db import db_settings
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations"
+MIGRATION_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+MIGRATION_LOCK_ID = 7430002
+SCHEMA_MIGRATIONS_SQL = """
+CREATE TABLE IF NOT EXISTS public.schema_migrations (
+    version text PRIMARY KEY,
+    name text NOT NULL,
+    checksum text NOT NULL,
+    applied_at timestamptz NOT NULL DEFAULT now()
+)
+"""
+
+
+def list_migrations():
+    migrations = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        match = MIGRATION_FILE_RE.match(path.name)
+        if match is None:
+            continue
+        migrations.append(
+            {
+                "version": match.group(1),
+                "name": match.group(2),
+                "path": path,
+                "checksum": hashlib.sha256(path.read_bytes()).hexdigest(),
+            }
+        )
+    return migrations
+
+
+# A dedicated autocommit connection without the pool's statement_timeout,
+# since a migration may rewrite or index the whole table.
+def connect_for_migrations():
+    settings = db_settings()
+    settings.pop("options", None)
+    conn = psycopg2.connect(**settings)
+    conn.autocommit = True
+    return conn
+
+
+def applied_migrations(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT to_regclass('public.schema_migrations') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return {}
+        cur.execute("SELECT version, name, checksum, applied_at FROM public.schema_migrations")
+        return {
+            row[0]: {"name": row[1], "checksum": row[2], "applied_at": row[3]}
+            for row in cur.fetchall()
+        }
+    finally:
+        cur.close()
+
+
+def pending_migrations(conn):
+    applied = applied_migrations(conn)
+    return [migration for migration in list_migrations() if migration["version"] not in applied]
+
+
+# Apply the pending migrations in version order; one process at a time.
+# Each file is sent as a single query, so it runs as one transaction unless it
+# has its own BEGIN/COMMIT. A file is recorded after it succeeds, so files
+# must be safe to rerun if the process dies in between.
+def migrate(conn, progress=None):
+    cur = conn.cursor()
+    cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        cur.execute(SCHEMA_MIGRATIONS_SQL)
+        pending = pending_migrations(conn)
+        for migration in pending:
+            if progress is not None:
+                progress(migration)
+            cur.execute(migration["path"].read_text(encoding="utf-8"))
+            cur.execute(
+                "INSERT INTO public.schema_migrations (version, name, checksum)"
+                " VALUES (%s, %s, %s) ON CONFLICT (version) DO NOTHING",
+                (migration["version"], migration["name"], migration["checksum"]),
+            )
+        return pending
+    finally:
+        # A failure inside a file's own BEGIN leaves the transaction open.
+        if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            cur.execute("ROLLBACK")
+        cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+        cur.close()
+
+
+# Index names in the plan of a query. Sequential scans are disabled for the
+# EXPLAIN, so on a table small enough for a seq scan to be cheaper the plan
+# still shows whether a matching index exists and is usable.
+def plan_indexes(conn, sql, params=None):
+    cur = conn.cursor()
+    try:
+        cur.execute("SET LOCAL enable_seqscan = off")
+        cur.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cur.fetchone()[0]
+    finally:
+        cur.close()
+        conn.rollback()
+
+    indexes = set()
+    nodes = [entry["Plan"] for entry in plan]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    return indexes
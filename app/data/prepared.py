@@ -0,0 +1,86 @@
+import re
+from collections import OrderedDict
+from hashlib import sha1
+from os import environ as env
+
+from psycopg2.extensions import connection as _pg_connection
+
+from .cache import TTLCache
+
+_PLACEHOLDER = re.compile(r"%%|%s")
+_sql_texts = TTLCache(maxsize=int(env.get("QUERY_CACHE_SIZE", 512)), ttl=float("inf"))
+
+
+# Connection that remembers which statements it has already PREPAREd. Prepared
+# statements live as long as the server session, so the registry is per
+# connection and survives rollbacks.
+class PreparedConnection(_pg_connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = OrderedDict()
+
+
+def prepared_enabled():
+    return env.get("DB_PREPARED_STATEMENTS", "1") != "0"
+
+
+def _to_server_placeholders(sql):
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        if match.group(0) == "%%":
+            return "%"
+        count += 1
+        return f"${count}"
+
+    return _PLACEHOLDER.sub(replace, sql), count
+
+
+def _prepare(cur, sql):
+    conn = cur.connection
+    name = f"ps_{sha1(sql.encode('utf-8')).hexdigest()[:20]}"
+    if name in conn.prepared:
+        conn.prepared.move_to_end(name)
+        return name, conn.prepared[name]
+
+    server_sql, count = _to_server_placeholders(sql)
+    cur.execute(f"PREPARE {name} AS {server_sql}")
+    conn.prepared[name] = count
+    limit = int(env.get("DB_PREPARED_MAX", 256))
+    while len(conn.prepared) > limit:
+        oldest, _ = conn.prepared.popitem(last=False)
+        cur.execute(f"DEALLOCATE {oldest}")
+    return name, count
+
+
+# Run a %s-style statement through a server-side prepared statement, so it is
+# parsed and planned once per pooled connection. Falls back to a plain execute
+# when disabled (DB_PREPARED_STATEMENTS=0) or on non-pool connections.
+def execute_prepared(cur, sql, params=()):
+    if not prepared_enabled() or not hasattr(cur.connection, "prepared"):
+        cur.execute(sql, params)
+        return
+    name, count = _prepare(cur, sql)
+    if len(params) != count:
+        raise ValueError(f"Statement expects {count} parameters, got {len(params)}.")
+    if count:
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * count)})", params)
+    else:
+        cur.execute(f"EXECUTE {name}")
+
+
+# SQL text for a query shape. Builders describe a request by a hashable shape
+# (which filters, operators and clauses are present, never the values) and
+# only assemble the text the first time that shape is seen. Equal shapes give
+# the identical text, so they also share one prepared statement.
+def compile_sql(shape, build):
+    hit, sql = _sql_texts.get(shape)
+    if not hit:
+        sql = build()
+        _sql_texts.set(shape, sql)
+    return sql
+
+
+def sql_cache_stats():
+    return _sql_texts.stats()
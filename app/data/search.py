@@ -0,0 +1,29 @@
+from os import environ as env
+
+# Must match public.zdenci_search_fold() in app/migrations/0001_search_document.sql.
+SEARCH_FOLD_FROM = "ČĆŠŽĐčćšžđ"
+SEARCH_FOLD_TO = "ccszdccszd"
+SEARCH_DIACRITICS_MODES = {"strict", "ignore"}
+
+_FOLD_TABLE = str.maketrans(SEARCH_FOLD_FROM, SEARCH_FOLD_TO)
+
+
+def fold_diacritics(value):
+    return value.lower().translate(_FOLD_TABLE)
+
+
+def get_diacritics_mode(value=None):
+    mode = (value or "").strip().lower()
+    if mode not in SEARCH_DIACRITICS_MODES:
+        mode = env.get("SEARCH_DIACRITICS", "strict").strip().lower()
+    return mode if mode in SEARCH_DIACRITICS_MODES else "strict"
+
+
+# Global search over the maintained per-zdenac search document (trigram indexed).
+def build_global_search_clause(search_value, diacritics="strict"):
+    if not search_value:
+        return None, []
+    term = search_value.lower()
+    if diacritics == "ignore":
+        return "z.search_doc_folded LIKE %s", [f"%{fold_diacritics(term)}%"]
+    return "z.search_doc LIKE %s", [f"%{term}%"]
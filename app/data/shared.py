@@ -0,0 +1,78 @@
+import json
+import logging
+import threading
+from os import environ as env
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_state = {"backend": None, "url": None}
+
+
+# Optional Redis backend that lets several worker processes share cached
+# results and the dataset version. Errors degrade to "miss" / local state.
+class RedisBackend:
+    def __init__(self, url, prefix="zdenci:"):
+        import redis
+
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=0.5, socket_connect_timeout=0.5
+        )
+        self._errors = redis.RedisError
+        self._prefix = prefix
+
+    def get(self, key):
+        try:
+            raw = self._client.get(f"{self._prefix}cache:{key}")
+        except self._errors as exc:
+            logger.warning("Shared cache read failed: %s", exc)
+            return False, None
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)
+
+    def set(self, key, value, ttl):
+        try:
+            self._client.set(
+                f"{self._prefix}cache:{key}",
+                json.dumps(value, default=str),
+                ex=max(1, int(ttl)),
+            )
+        except self._errors as exc:
+            logger.warning("Shared cache write failed: %s", exc)
+
+    def get_version(self):
+        try:
+            version, changed_at = self._client.mget(
+                f"{self._prefix}version", f"{self._prefix}changed_at"
+            )
+        except self._errors as exc:
+            logger.warning("Shared version read failed: %s", exc)
+            return None
+        return int(version or 0), float(changed_at) if changed_at else None
+
+    def bump_version(self, changed_at):
+        try:
+            pipe = self._client.pipeline()
+            pipe.incr(f"{self._prefix}version")
+            pipe.set(f"{self._prefix}changed_at", changed_at)
+            version, _ = pipe.execute()
+        except self._errors as exc:
+            logger.warning("Shared version bump failed: %s", exc)
+            return None
+        return version
+
+
+def get_shared_backend():
+    url = env.get("CACHE_REDIS_URL")
+    if not url:
+        return None
+    with _lock:
+        if _state["url"] != url:
+            _state["url"] = url
+            try:
+                _state["backend"] = RedisBackend(url, env.get("CACHE_REDIS_PREFIX", "zdenci:"))
+            except ImportError:
+                logger.warning("CACHE_REDIS_URL is set but the redis package is not installed.")
+                _state["backend"] = None
+        return _state["backend"]
@@ -0,0 +1,279 @@
+import hashlib
+import json
+from itertools import groupby
+from pathlib import Path
+from uuid import uuid4
+
+import psycopg2
+
+from ..compression import available_encodings, iter_compress, variant_path
+from .jsonld import get_jsonld_mode
+from .snapshots import (
+    STREAM_CHUNK_SIZE,
+    iter_csv_payload,
+    iter_json_group,
+    iter_zdenci_data,
+    json_group_name,
+)
+
+APP_DIR = Path(__file__).resolve().parents[1]
+SNAPSHOT_DIR = APP_DIR / "static" / "data"
+CSV_SNAPSHOT_PATH = SNAPSHOT_DIR / "zdenci.csv"
+JSON_SNAPSHOT_PATH = SNAPSHOT_DIR / "zdenci.json"
+COMPACT_JSON_SNAPSHOT_PATH = SNAPSHOT_DIR / "zdenci.min.json"
+FRAGMENT_DIR = APP_DIR.parent / "instance" / "snapshot_fragments"
+MANIFEST_PATH = FRAGMENT_DIR / "manifest.json"
+FRAGMENT_FORMAT = 2
+SNAPSHOT_ORDER = " ORDER BY g.naziv_gc ASC, z.lokacija ASC, z.id ASC"
+SNAPSHOT_LOCK_ID = 7430001
+
+
+def write_atomic(path, chunks, binary=False):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+    try:
+        with open(
+            temp_path, "wb" if binary else "w", encoding=None if binary else "utf-8"
+        ) as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    temp_path.replace(path)
+
+
+def _read_chunks(path, binary=False):
+    with open(path, "rb" if binary else "r", encoding=None if binary else "utf-8") as handle:
+        while True:
+            chunk = handle.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _fragment_key(naziv_gc):
+    if naziv_gc is None:
+        return "null"
+    return hashlib.sha1(naziv_gc.encode("utf-8")).hexdigest()[:20]
+
+
+def _load_manifest():
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if manifest.get("format") != FRAGMENT_FORMAT:
+        return None
+    # Fragments written under another JSONLD_CONTEXT_MODE are rebuilt.
+    if manifest.get("jsonld", "embedded") != get_jsonld_mode():
+        return None
+    return manifest
+
+
+def _write_manifest(groups):
+    payload = json.dumps(
+        {"format": FRAGMENT_FORMAT, "jsonld": get_jsonld_mode(), "groups": groups},
+        ensure_ascii=False,
+        indent=2,
+    )
+    write_atomic(MANIFEST_PATH, [payload])
+
+
+# Each district keeps a CSV fragment (rows, no header) and an indented and a
+# compact JSON fragment (its group object), ready to be concatenated into the
+# snapshot files.
+def _write_group(groups, naziv_gc, rows):
+    key = _fragment_key(naziv_gc)
+    if not rows:
+        for suffix in (".csv", ".json", ".min.json"):
+            (FRAGMENT_DIR / f"{key}{suffix}").unlink(missing_ok=True)
+        groups.pop(key, None)
+        return
+    gc = json_group_name({"naziv_gc": naziv_gc})
+    write_atomic(FRAGMENT_DIR / f"{key}.csv", iter_csv_payload(rows, header=False))
+    write_atomic(FRAGMENT_DIR / f"{key}.json", iter_json_group(gc, rows))
+    write_atomic(FRAGMENT_DIR / f"{key}.min.json", iter_json_group(gc, rows, compact=True))
+    groups[key] = {"naziv_gc": naziv_gc, "rows": len(rows)}
+
+
+def _rebuild_all(conn):
+    if FRAGMENT_DIR.exists():
+        for path in FRAGMENT_DIR.glob("*.csv"):
+            path.unlink()
+        for path in FRAGMENT_DIR.glob("*.json"):
+            if path != MANIFEST_PATH:
+                path.unlink()
+    groups = {}
+    rows = iter_zdenci_data(conn, order_clause=SNAPSHOT_ORDER)
+    try:
+        for naziv_gc, group_rows in groupby(rows, key=lambda row: row.get("naziv_gc")):
+            _write_group(groups, naziv_gc, list(group_rows))
+    finally:
+        rows.close()
+    return groups
+
+
+def _rebuild_group(conn, groups, naziv_gc):
+    if naziv_gc is None:
+        where_clause, params = " WHERE g.naziv_gc IS NULL", []
+    else:
+        where_clause, params = " WHERE g.naziv_gc = %s", [naziv_gc]
+    rows = list(
+        iter_zdenci_data(
+            conn,
+            where_clause=where_clause,
+            params=params,
+            order_clause=" ORDER BY z.lokacija ASC, z.id ASC",
+        )
+    )
+    _write_group(groups, naziv_gc, rows)
+    return len(rows)
+
+
+# Fragment keys in the same order as ORDER BY g.naziv_gc ASC (NULLs last).
+def _ordered_group_keys(conn, groups):
+    cur = conn.cursor()
+    cur.execute("SELECT naziv_gc FROM gradska_cetvrt ORDER BY naziv_gc ASC")
+    names = [row[0] for row in cur.fetchall()]
+    cur.close()
+
+    remaining = {entry["naziv_gc"]: key for key, entry in groups.items()}
+    ordered = [remaining.pop(name) for name in names if name in remaining]
+    unknown = remaining.pop(None, None)
+    ordered.extend(remaining[name] for name in sorted(remaining))
+    if unknown is not None:
+        ordered.append(unknown)
+    return ordered
+
+
+def _iter_csv_snapshot(keys):
+    yield from iter_csv_payload([])
+    for key in keys:
+        yield from _read_chunks(FRAGMENT_DIR / f"{key}.csv")
+
+
+def _iter_json_snapshot(keys):
+    if not keys:
+        yield "[]"
+        return
+    yield "[\n"
+    for index, key in enumerate(keys):
+        if index:
+            yield ",\n"
+        yield from _read_chunks(FRAGMENT_DIR / f"{key}.json")
+    yield "\n]"
+
+
+def _iter_compact_json_snapshot(keys):
+    yield "["
+    for index, key in enumerate(keys):
+        if index:
+            yield ","
+        yield from _read_chunks(FRAGMENT_DIR / f"{key}.min.json")
+    yield "]"
+
+
+def _variant_paths():
+    for path in (CSV_SNAPSHOT_PATH, JSON_SNAPSHOT_PATH, COMPACT_JSON_SNAPSHOT_PATH):
+        for encoding in available_encodings():
+            yield path, variant_path(path, encoding), encoding
+
+
+def _variants_stale():
+    try:
+        return any(
+            variant.stat().st_mtime < path.stat().st_mtime
+            for path, variant, _ in _variant_paths()
+        )
+    except OSError:
+        return True
+
+
+# gzip/brotli siblings of every snapshot file, for the static route to pick
+# by Accept-Encoding. Files are compressed chunk by chunk.
+def _write_variants():
+    for path, variant, encoding in _variant_paths():
+        write_atomic(
+            variant,
+            iter_compress(_read_chunks(path, binary=True), encoding, static=True),
+            binary=True,
+        )
+
+
+# Claim the logged changes; entries from uncommitted writes stay for the next run.
+def _consume_change_log(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT to_regclass('public.zdenac_change_log') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return None
+        cur.execute("DELETE FROM zdenac_change_log RETURNING naziv_gc")
+        return {row[0] for row in cur.fetchall()}
+    finally:
+        cur.close()
+
+
+# Only one refresh at a time across all workers; held until commit/rollback.
+def _try_lock(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT pg_try_advisory_xact_lock(%s)", (SNAPSHOT_LOCK_ID,))
+    locked = cur.fetchone()[0]
+    cur.close()
+    return locked
+
+
+def _report(progress, stage, done=0, total=0):
+    if progress is not None:
+        progress(stage=stage, done=done, total=total)
+
+
+# Rebuild only the districts touched since the last refresh, then reassemble
+# both snapshot files from the cached per-district fragments.
+def refresh_snapshots(conn, progress=None):
+    try:
+        if not _try_lock(conn):
+            conn.rollback()
+            return {"mode": "skipped", "groups": 0, "rows": 0}
+
+        _report(progress, "changes")
+        changed = _consume_change_log(conn)
+        manifest = _load_manifest()
+        full = (
+            changed is None
+            or manifest is None
+            or not CSV_SNAPSHOT_PATH.exists()
+            or not JSON_SNAPSHOT_PATH.exists()
+            or not COMPACT_JSON_SNAPSHOT_PATH.exists()
+        )
+
+        if full:
+            _report(progress, "rebuild")
+            groups = _rebuild_all(conn)
+            rebuilt = len(groups)
+            rows = sum(entry["rows"] for entry in groups.values())
+        else:
+            groups = manifest["groups"]
+            rebuilt = len(changed)
+            rows = 0
+            for done, naziv_gc in enumerate(changed):
+                _report(progress, "rebuild", done, rebuilt)
+                rows += _rebuild_group(conn, groups, naziv_gc)
+
+        if full or changed:
+            _report(progress, "assemble", rebuilt, rebuilt)
+            keys = _ordered_group_keys(conn, groups)
+            write_atomic(CSV_SNAPSHOT_PATH, _iter_csv_snapshot(keys))
+            write_atomic(JSON_SNAPSHOT_PATH, _iter_json_snapshot(keys))
+            write_atomic(COMPACT_JSON_SNAPSHOT_PATH, _iter_compact_json_snapshot(keys))
+            _write_manifest(groups)
+        if full or changed or _variants_stale():
+            _report(progress, "compress")
+            _write_variants()
+        conn.commit()
+    except (psycopg2.Error, OSError):
+        conn.rollback()
+        raise
+
+    _report(progress, "done", rebuilt, rebuilt)
+    return {"mode": "full" if full else "incremental", "groups": rebuilt, "rows": rows}
@@ -1,54 +1,135 @@
 import csv
 import io
 import json
+from itertools import groupby
 
-from .db import conn, fetch_rows_with_cols
+from .db import iter_query
 from .jsonld import add_jsonld
 from .zdenci_constants import BASE_FROM, CSV_COLUMNS, JSON_COLUMNS, SELECT_COLUMNS
 
+STREAM_CHUNK_SIZE = 64 * 1024
 
-def fetch_zdenci_data(where_clause="", params=None, order_clause=""):
-    if params is None:
-        params = []
-    cur = conn.cursor()
-    cur.execute(
+
+# Stream zdenac rows in bounded memory through a server-side cursor.
+def iter_zdenci_data(conn, where_clause="", params=None, order_clause="", row_mode="dict"):
+    return iter_query(
+        conn,
         f"SELECT {SELECT_COLUMNS} {BASE_FROM}{where_clause}{order_clause}",
         params,
+        row_mode=row_mode,
     )
-    rows, cols = fetch_rows_with_cols(cur)
-    cur.close()
-    return [dict(zip(cols, row)) for row in rows] if cols else []
 
 
-def build_csv_payload(data, columns=CSV_COLUMNS):
+# Join small string pieces into chunks of roughly STREAM_CHUNK_SIZE characters.
+def _buffered(pieces, chunk_size=STREAM_CHUNK_SIZE):
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _iter_csv_lines(data, columns, header=True):
     output = io.StringIO()
     writer = csv.writer(output, lineterminator="\n")
-    writer.writerow(columns)
+    if header:
+        writer.writerow(columns)
+        yield output.getvalue()
     for row in data:
+        output.seek(0)
+        output.truncate(0)
         writer.writerow([row.get(key, "") if row.get(key) is not None else "" for key in columns])
-    return output.getvalue()
+        yield output.getvalue()
 
 
-def build_grouped_json_payload(data, json_columns=JSON_COLUMNS):
-    grouped = {}
-    for row in data:
-        gc = row.get("naziv_gc") or "Nepoznato"
-        items = grouped.setdefault(gc, [])
-        entry = {}
-        for key in json_columns:
-            value = row.get(key)
-            if value == "":
-                value = None
-            if key in {"lon", "lat"}:
-                if value is None:
-                    entry[key] = None
-                else:
-                    try:
-                        entry[key] = float(value)
-                    except (TypeError, ValueError):
-                        entry[key] = None
+def iter_csv_payload(data, columns=CSV_COLUMNS, header=True):
+    return _buffered(_iter_csv_lines(data, columns, header))
+
+
+def build_csv_payload(data, columns=CSV_COLUMNS):
+    return "".join(iter_csv_payload(data, columns))
+
+
+def _build_json_entry(row, json_columns):
+    entry = {}
+    for key in json_columns:
+        value = row.get(key)
+        if value == "":
+            value = None
+        if key in {"lon", "lat"}:
+            if value is None:
+                entry[key] = None
             else:
-                entry[key] = value
-        items.append(add_jsonld(entry))
-    result = [{"naziv_gc": gc, "zdenci": grouped[gc]} for gc in grouped]
-    return json.dumps(result, ensure_ascii=False, indent=2)
+                try:
+                    entry[key] = float(value)
+                except (TypeError, ValueError):
+                    entry[key] = None
+        else:
+            entry[key] = value
+    return add_jsonld(entry)
+
+
+def _indent(text, prefix):
+    return "\n".join(prefix + line for line in text.split("\n"))
+
+
+def json_group_name(row):
+    return row.get("naziv_gc") or "Nepoznato"
+
+
+# One group object of the grouped payload, indented as a top-level array item.
+def _iter_json_group_pieces(gc, rows, json_columns):
+    yield (
+        "  {\n"
+        f'    "naziv_gc": {json.dumps(gc, ensure_ascii=False)},\n'
+        '    "zdenci": [\n'
+    )
+    for index, row in enumerate(rows):
+        if index:
+            yield ",\n"
+        entry = json.dumps(_build_json_entry(row, json_columns), ensure_ascii=False, indent=2)
+        yield _indent(entry, "      ")
+    yield "\n    ]\n  }"
+
+
+# The same group object without whitespace, as json.dumps(...,
+# separators=(",", ":")) writes it.
+def _iter_compact_json_group_pieces(gc, rows, json_columns):
+    yield f'{{"naziv_gc":{json.dumps(gc, ensure_ascii=False)},"zdenci":['
+    for index, row in enumerate(rows):
+        if index:
+            yield ","
+        yield json.dumps(
+            _build_json_entry(row, json_columns), ensure_ascii=False, separators=(",", ":")
+        )
+    yield "]}"
+
+
+def iter_json_group(gc, rows, json_columns=JSON_COLUMNS, compact=False):
+    pieces = _iter_compact_json_group_pieces if compact else _iter_json_group_pieces
+    return _buffered(pieces(gc, rows, json_columns))
+
+
+# Emits exactly what json.dumps(groups, ensure_ascii=False, indent=2) would, one
+# entry at a time. Rows must arrive ordered by naziv_gc so groups are contiguous.
+def _iter_grouped_json_pieces(data, json_columns):
+    empty = True
+    for gc, rows in groupby(data, key=json_group_name):
+        yield "[\n" if empty else ",\n"
+        empty = False
+        yield from _iter_json_group_pieces(gc, rows, json_columns)
+    yield "[]" if empty else "\n]"
+
+
+def iter_grouped_json_payload(data, json_columns=JSON_COLUMNS):
+    return _buffered(_iter_grouped_json_pieces(data, json_columns))
+
+
+def build_grouped_json_payload(data, json_columns=JSON_COLUMNS):
+    return "".join(iter_grouped_json_payload(data, json_columns))
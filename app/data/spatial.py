@@ -0,0 +1,157 @@
+import heapq
+import math
+import threading
+import time
+from operator import itemgetter
+from os import environ as env
+
+from .changes import current_version
+from .db import iter_query
+from .zdenci_constants import BASE_FROM, MAP_COLUMNS, MAP_SELECT_COLUMNS
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+SPATIAL_INDEX_TTL = float(env.get("SPATIAL_INDEX_TTL", 60))
+SPATIAL_KEYS = [key for key, _ in MAP_COLUMNS]
+_LON = SPATIAL_KEYS.index("lon")
+_LAT = SPATIAL_KEYS.index("lat")
+
+_lock = threading.Lock()
+_index = {"tree": None, "version": None, "built_at": 0.0}
+
+
+def haversine_m(lon1, lat1, lon2, lat2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+# Static 2-d tree over rows with float lon/lat, stored implicitly in one list:
+# the median of each range is the node, the two halves are its subtrees and the
+# split axis alternates. Nodes are (lon, lat, row); for the nearest-neighbour
+# search lon distances are scaled by cos(lat) of the data centre.
+class KDTree:
+    def __init__(self, rows):
+        self._nodes = [(row[_LON], row[_LAT], row) for row in rows]
+        if self._nodes:
+            mean_lat = sum(node[1] for node in self._nodes) / len(self._nodes)
+            self._lon_scale = math.cos(math.radians(mean_lat))
+        else:
+            self._lon_scale = 1.0
+        self._build(0, len(self._nodes), 0)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def _build(self, lo, hi, axis):
+        if hi - lo <= 1:
+            return
+        self._nodes[lo:hi] = sorted(self._nodes[lo:hi], key=itemgetter(axis))
+        mid = (lo + hi) // 2
+        self._build(lo, mid, 1 - axis)
+        self._build(mid + 1, hi, 1 - axis)
+
+    # Rows inside [min_lon, max_lon] x [min_lat, max_lat], in tree order.
+    def bbox(self, min_lon, min_lat, max_lon, max_lat):
+        low = (min_lon, min_lat)
+        high = (max_lon, max_lat)
+        found = []
+        stack = [(0, len(self._nodes), 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            node = self._nodes[mid]
+            if min_lon <= node[0] <= max_lon and min_lat <= node[1] <= max_lat:
+                found.append(node[2])
+            if node[axis] >= low[axis]:
+                stack.append((lo, mid, 1 - axis))
+            if node[axis] <= high[axis]:
+                stack.append((mid + 1, hi, 1 - axis))
+        return found
+
+    # (distance_m, row) pairs within radius_m, nearest first. The bounding box
+    # encloses the circle, so the haversine filter is exact.
+    def within(self, lon, lat, radius_m):
+        dlat = radius_m / METERS_PER_DEGREE
+        max_abs_lat = min(89.9, abs(lat) + dlat)
+        dlon = min(180.0, dlat / math.cos(math.radians(max_abs_lat)))
+        found = []
+        for row in self.bbox(lon - dlon, lat - dlat, lon + dlon, lat + dlat):
+            distance = haversine_m(lon, lat, row[_LON], row[_LAT])
+            if distance <= radius_m:
+                found.append((distance, row))
+        found.sort(key=lambda item: (item[0], item[1][0]))
+        return found
+
+    # k nearest rows as (distance_m, row) pairs. The tree search ranks by the
+    # scaled planar distance; re-querying within the farthest of those k by
+    # haversine makes the final ranking exact.
+    def nearest(self, lon, lat, k):
+        if k < 1 or not self._nodes:
+            return []
+        target = (lon * self._lon_scale, lat)
+        heap = []
+        stack = [(0, len(self._nodes), 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            node = self._nodes[mid]
+            point = (node[0] * self._lon_scale, node[1])
+            dist2 = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2
+            if len(heap) < k:
+                heapq.heappush(heap, (-dist2, mid))
+            elif dist2 < -heap[0][0]:
+                heapq.heapreplace(heap, (-dist2, mid))
+
+            delta = target[axis] - point[axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if delta < 0 else ((mid + 1, hi), (lo, mid))
+            if len(heap) < k or delta * delta < -heap[0][0]:
+                stack.append((far[0], far[1], 1 - axis))
+            stack.append((near[0], near[1], 1 - axis))
+
+        radius = max(
+            haversine_m(lon, lat, self._nodes[index][0], self._nodes[index][1])
+            for _, index in heap
+        )
+        return self.within(lon, lat, radius)[:k]
+
+
+def _spatial_row(row):
+    values = list(row)
+    values[_LON] = float(values[_LON])
+    values[_LAT] = float(values[_LAT])
+    return tuple(values)
+
+
+def _load_index(conn):
+    rows = iter_query(
+        conn,
+        f"SELECT {MAP_SELECT_COLUMNS} {BASE_FROM} WHERE z.lon IS NOT NULL AND z.lat IS NOT NULL",
+        row_mode="tuple",
+    )
+    try:
+        return KDTree(_spatial_row(row) for row in rows)
+    finally:
+        rows.close()
+
+
+# Shared index, rebuilt on the first query after a write or once the TTL has
+# passed (writes made outside this process are not signalled).
+def get_spatial_index(conn):
+    version = current_version()
+    now = time.monotonic()
+    with _lock:
+        if (
+            _index["tree"] is None
+            or _index["version"] != version
+            or now - _index["built_at"] > SPATIAL_INDEX_TTL
+        ):
+            _index.update({"tree": _load_index(conn), "version": version, "built_at": now})
+        return _index["tree"]
@@ -0,0 +1,112 @@
+from .db import fetch_rows_with_cols
+
+# Per-group counters maintained by app/migrations/0003_statistics.sql. Without
+# the migration the same groups are counted from zdenac on the fly, so the
+# queries below work either way.
+STATS_TABLE = "zdenac_stats s"
+LIVE_STATS = """(
+    SELECT naziv_gc_id, status_odrz, tip_zdenca, aktivan_da_ne,
+           lon IS NOT NULL AND lat IS NOT NULL AS has_coordinates, COUNT(*) AS total
+    FROM zdenac
+    GROUP BY 1, 2, 3, 4, 5
+) s"""
+STATS_TABLE_EXISTS_SQL = "SELECT to_regclass('public.zdenac_stats') IS NOT NULL"
+
+ACTIVE_COUNTS = """
+       COALESCE(SUM(s.total) FILTER (WHERE LOWER(s.aktivan_da_ne) = 'da'), 0)::bigint AS active,
+       COALESCE(SUM(s.total) FILTER (WHERE LOWER(s.aktivan_da_ne) = 'ne'), 0)::bigint AS inactive"""
+
+STATUS_TOTALS_SQL = """
+SELECT COALESCE(s.status_odrz, 'Unknown') AS status, SUM(s.total)::bigint AS total
+FROM {source}
+GROUP BY status
+ORDER BY total DESC, status ASC
+"""
+
+DISTRICT_TOTALS_SQL = """
+SELECT g.id AS id, g.naziv_gc AS naziv_gc, COALESCE(SUM(s.total), 0)::bigint AS total_zdenci
+FROM gradska_cetvrt g
+LEFT JOIN {source} ON s.naziv_gc_id = g.id
+GROUP BY g.id, g.naziv_gc
+ORDER BY g.naziv_gc ASC
+"""
+
+# Zdenci without a district are reported as a last row with id null.
+DISTRICT_STATS_SQL = """
+SELECT g.id AS id, g.naziv_gc AS naziv_gc,
+       COALESCE(SUM(s.total), 0)::bigint AS total,{active_counts},
+       COALESCE(SUM(s.total) FILTER (WHERE s.has_coordinates), 0)::bigint AS with_coordinates
+FROM {source}
+FULL JOIN gradska_cetvrt g ON g.id = s.naziv_gc_id
+GROUP BY g.id, g.naziv_gc
+ORDER BY g.naziv_gc ASC NULLS LAST
+"""
+
+STATUS_STATS_SQL = """
+SELECT COALESCE(s.status_odrz, 'Unknown') AS status,
+       SUM(s.total)::bigint AS total,{active_counts}
+FROM {source}
+GROUP BY status
+ORDER BY total DESC, status ASC
+"""
+
+TYPE_STATUS_STATS_SQL = """
+SELECT COALESCE(s.tip_zdenca, 'Unknown') AS tip_zdenca,
+       COALESCE(s.status_odrz, 'Unknown') AS status,
+       SUM(s.total)::bigint AS total
+FROM {source}
+GROUP BY 1, 2
+ORDER BY 1 ASC, total DESC, 2 ASC
+"""
+
+COORDINATE_COVERAGE_SQL = """
+SELECT COALESCE(SUM(s.total), 0)::bigint AS total,
+       COALESCE(SUM(s.total) FILTER (WHERE s.has_coordinates), 0)::bigint AS with_coordinates
+FROM {source}
+"""
+
+
+# Statement text for a template, given the result of STATS_TABLE_EXISTS_SQL.
+def stats_sql(template, table_exists):
+    source = STATS_TABLE if table_exists else LIVE_STATS
+    return template.format(source=source, active_counts=ACTIVE_COUNTS)
+
+
+def _query(conn, template):
+    cur = conn.cursor()
+    try:
+        cur.execute(STATS_TABLE_EXISTS_SQL)
+        cur.execute(stats_sql(template, cur.fetchone()[0]))
+        rows, cols = fetch_rows_with_cols(cur)
+        return [dict(zip(cols, row)) for row in rows]
+    finally:
+        cur.close()
+
+
+def status_totals(conn):
+    return _query(conn, STATUS_TOTALS_SQL)
+
+
+def district_totals(conn):
+    return _query(conn, DISTRICT_TOTALS_SQL)
+
+
+def district_stats(conn):
+    return _query(conn, DISTRICT_STATS_SQL)
+
+
+def status_stats(conn):
+    return _query(conn, STATUS_STATS_SQL)
+
+
+def type_status_stats(conn):
+    return _query(conn, TYPE_STATUS_STATS_SQL)
+
+
+def coordinate_coverage(conn):
+    coverage = _query(conn, COORDINATE_COVERAGE_SQL)[0]
+    coverage["without_coordinates"] = coverage["total"] - coverage["with_coordinates"]
+    coverage["ratio"] = (
+        round(coverage["with_coordinates"] / coverage["total"], 4) if coverage["total"] else None
+    )
+    return coverage
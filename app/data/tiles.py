@@ -0,0 +1,80 @@
+import math
+from collections import Counter
+from os import environ as env
+
+from .cache import cached_result
+from .spatial import SPATIAL_KEYS, get_spatial_index
+
+TILE_SIZE = 256
+TILE_CELL_PX = 64
+TILE_MAX_ZOOM = 22
+TILE_CLUSTER_MAX_ZOOM = int(env.get("TILE_CLUSTER_MAX_ZOOM", 17))
+MAX_MERCATOR_LAT = 85.05112878
+_LON = SPATIAL_KEYS.index("lon")
+_LAT = SPATIAL_KEYS.index("lat")
+_GC = SPATIAL_KEYS.index("naziv_gc")
+
+
+# Web Mercator position in global pixels at zoom z.
+def lonlat_to_pixel(lon, lat, z):
+    scale = TILE_SIZE * 2 ** z
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    sin_lat = math.sin(math.radians(lat))
+    x = (lon + 180.0) / 360.0 * scale
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+
+def tile_bounds(z, x, y):
+    n = 2 ** z
+    min_lon = x / n * 360.0 - 180.0
+    max_lon = (x + 1) / n * 360.0 - 180.0
+    max_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    min_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def _point(row):
+    return dict(zip(SPATIAL_KEYS, row))
+
+
+# Points are grouped into TILE_CELL_PX cells of the global pixel grid, so a
+# cluster never straddles two tiles. Single points and every point above
+# TILE_CLUSTER_MAX_ZOOM are returned as they are.
+def _build_tile(conn, z, x, y):
+    cells = {}
+    for row in get_spatial_index(conn).bbox(*tile_bounds(z, x, y)):
+        px, py = lonlat_to_pixel(row[_LON], row[_LAT], z)
+        if int(px // TILE_SIZE) != x or int(py // TILE_SIZE) != y:
+            continue
+        cells.setdefault((int(px // TILE_CELL_PX), int(py // TILE_CELL_PX)), []).append(row)
+
+    clusters = []
+    points = []
+    for _, rows in sorted(cells.items()):
+        if len(rows) == 1 or z > TILE_CLUSTER_MAX_ZOOM:
+            points.extend(_point(row) for row in rows)
+            continue
+        clusters.append(
+            {
+                "lon": round(sum(row[_LON] for row in rows) / len(rows), 7),
+                "lat": round(sum(row[_LAT] for row in rows) / len(rows), 7),
+                "count": len(rows),
+                "naziv_gc": dict(
+                    Counter(row[_GC] or "Nepoznato" for row in rows).most_common()
+                ),
+            }
+        )
+    points.sort(key=lambda point: point["id"])
+    return {
+        "z": z,
+        "x": x,
+        "y": y,
+        "total": sum(len(rows) for rows in cells.values()),
+        "clusters": clusters,
+        "points": points,
+    }
+
+
+def get_tile(conn, z, x, y):
+    return cached_result("tile", [z, x, y], lambda: _build_tile(conn, z, x, y))
@@ -0,0 +1,98 @@
+import mimetypes
+from os import environ as env
+from pathlib import Path
+from zlib import adler32
+
+from flask import current_app, request, send_file
+from werkzeug.security import safe_join
+
+from .compression import compression_enabled, precompressed_variant
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+FILE_SERVING_MODES = {"flask", "sendfile", "accel"}
+X_ACCEL_PREFIX = env.get("X_ACCEL_PREFIX", "/_files/")
+
+
+# flask: the worker streams the file through wsgi.file_wrapper. Only gunicorn
+# sync/gthread workers send it with os.sendfile; the development server, the
+# ASGI bridge and servers without a file_wrapper copy it through Python.
+# sendfile: an X-Sendfile header with the absolute path (Apache
+# mod_xsendfile, lighttpd).
+# accel: an X-Accel-Redirect to X_ACCEL_PREFIX plus the path relative to the
+# project directory (nginx internal location).
+def get_file_serving_mode():
+    mode = env.get("FILE_SERVING_MODE", "flask").strip().lower()
+    return mode if mode in FILE_SERVING_MODES else "flask"
+
+
+# Same validator as send_file, so switching modes keeps client caches valid.
+def _file_etag(path, stat):
+    check = adler32(str(path).encode()) & 0xFFFFFFFF
+    return f"{stat.st_mtime}-{stat.st_size}-{check}"
+
+
+# Headers only; the proxy sends the bytes and answers Range requests itself.
+# Conditional requests are still answered here with a 304.
+def _offload(path, mimetype, mode):
+    stat = path.stat()
+    response = current_app.response_class(mimetype=mimetype)
+    response.last_modified = stat.st_mtime
+    response.cache_control.no_cache = True
+    response.set_etag(_file_etag(path, stat))
+    response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+    if mode == "accel":
+        location = path.relative_to(PROJECT_DIR).as_posix()
+        response.headers["X-Accel-Redirect"] = f"{X_ACCEL_PREFIX.rstrip('/')}/{location}"
+    else:
+        response.headers["X-Sendfile"] = str(path)
+    return response
+
+
+def serve_file(path, mimetype=None, encoding=None):
+    path = Path(path).resolve()
+    if mimetype is None:
+        mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    mode = get_file_serving_mode()
+    if mode == "flask":
+        response = send_file(path, mimetype=mimetype, conditional=True)
+    else:
+        response = _offload(path, mimetype, mode)
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+# Snapshot files in static/data go through serve_file, from their
+# precompressed sibling when the client accepts one. Behind nginx the
+# original file is redirected and gzip_static/brotli_static pick the sibling,
+# because an X-Accel-Redirect response does not pass Content-Encoding on.
+def _serve_snapshot_file():
+    if request.endpoint != "static":
+        return None
+    filename = (request.view_args or {}).get("filename", "")
+    if not filename.startswith("data/"):
+        return None
+    path = safe_join(current_app.static_folder, filename)
+    if path is None or not Path(path).is_file():
+        return None
+
+    path = Path(path)
+    mode = get_file_serving_mode()
+    if mode == "accel":
+        response = serve_file(path)
+    else:
+        variant, encoding = precompressed_variant(path, request.headers.get("Accept-Encoding"))
+        response = serve_file(
+            variant,
+            mimetype=mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+            encoding=encoding,
+        )
+    if compression_enabled():
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def init_file_serving(app):
+    app.before_request(_serve_snapshot_file)
@@ -0,0 +1,338 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from os import environ as env
+from uuid import uuid4
+
+import psycopg2
+from psycopg2.extras import Json
+
+from .data.db import pooled_connection
+
+logger = logging.getLogger(__name__)
+
+JOB_HISTORY_SIZE = 50
+JOB_STALE_AFTER = float(env.get("JOB_STALE_AFTER", 900))
+# A running shared job refreshes heartbeat_at on this interval even when it
+# reports no progress, so a long but healthy job is never taken for stale.
+JOB_HEARTBEAT_INTERVAL = float(env.get("JOB_HEARTBEAT_INTERVAL", JOB_STALE_AFTER / 3))
+
+# Job records live in background_job (app/migrations/0005_background_jobs.sql)
+# so every worker process sees the same jobs. Without the migration they are
+# kept in the process that started them.
+JOB_TABLE_EXISTS_SQL = "SELECT to_regclass('public.background_job') IS NOT NULL"
+JOB_COLUMNS = (
+    "id",
+    "key",
+    "status",
+    "progress",
+    "result",
+    "error",
+    "created_at",
+    "started_at",
+    "finished_at",
+    "duration",
+)
+JOB_SELECT = ", ".join(JOB_COLUMNS)
+ACTIVE_STATUSES = "('queued', 'running')"
+
+EXPIRE_STALE_JOBS_SQL = f"""
+UPDATE background_job
+SET status = 'failed', error = 'Job stopped reporting progress.', finished_at = %(now)s
+WHERE key = %(key)s AND status IN {ACTIVE_STATUSES} AND heartbeat_at < %(stale_before)s
+"""
+INSERT_JOB_SQL = f"""
+INSERT INTO background_job (id, key, status, created_at, heartbeat_at)
+VALUES (%(id)s, %(key)s, 'queued', %(now)s, %(now)s)
+ON CONFLICT (key) WHERE status IN {ACTIVE_STATUSES} DO NOTHING
+RETURNING {JOB_SELECT}
+"""
+ACTIVE_JOB_SQL = f"""
+SELECT {JOB_SELECT} FROM background_job
+WHERE key = %s AND status IN {ACTIVE_STATUSES}
+"""
+TRIM_JOBS_SQL = f"""
+DELETE FROM background_job
+WHERE key = %(key)s AND status NOT IN {ACTIVE_STATUSES} AND id NOT IN (
+    SELECT id FROM background_job WHERE key = %(key)s
+    ORDER BY created_at DESC LIMIT %(keep)s
+)
+"""
+GET_JOB_SQL = f"SELECT {JOB_SELECT} FROM background_job WHERE id = %s"
+LATEST_JOB_SQL = f"""
+SELECT {JOB_SELECT} FROM background_job
+WHERE key = %s ORDER BY created_at DESC LIMIT 1
+"""
+LAST_ERROR_SQL = """
+SELECT id, error, finished_at FROM background_job
+WHERE key = %s AND status = 'failed' ORDER BY created_at DESC LIMIT 1
+"""
+
+_lock = threading.Lock()
+_executor = None
+_jobs = OrderedDict()
+_active = {}
+_last_errors = {}
+# Ids of shared jobs this process has queued or is running.
+_owned = set()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(env.get("JOB_WORKERS", 2)),
+                thread_name_prefix="job",
+            )
+        return _executor
+
+
+# Executor threads do not survive a fork; a child starts with its own.
+def _reset_after_fork():
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+    _active.clear()
+    _owned.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# Shared jobs that were still queued when the executor was cancelled would
+# otherwise look active until they go stale.
+def shutdown_jobs(wait=True):
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=True)
+    with _lock:
+        unfinished = list(_owned)
+        _owned.clear()
+    for job_id in unfinished:
+        _update_shared(
+            job_id,
+            status="failed",
+            error="Job cancelled at shutdown.",
+            finished_at=time.time(),
+        )
+
+
+def _table_exists(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute(JOB_TABLE_EXISTS_SQL)
+        return cur.fetchone()[0]
+    finally:
+        cur.close()
+
+
+def _row_to_job(row):
+    return dict(zip(JOB_COLUMNS, row)) if row else None
+
+
+def _json(value):
+    return Json(value, dumps=lambda data: json.dumps(data, default=str))
+
+
+def _snapshot(job):
+    data = dict(job)
+    data["last_error"] = _last_errors.get(job["key"])
+    return data
+
+
+def _shared_snapshot(cur, job):
+    cur.execute(LAST_ERROR_SQL, (job["key"],))
+    row = cur.fetchone()
+    job["last_error"] = {"job_id": row[0], "error": row[1], "at": row[2]} if row else None
+    return job
+
+
+def _submit_local(key):
+    with _lock:
+        active_id = _active.get(key)
+        if active_id is not None:
+            return _snapshot(_jobs[active_id]), False
+
+        job = {
+            "id": uuid4().hex,
+            "key": key,
+            "status": "queued",
+            "progress": None,
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "duration": None,
+        }
+        _jobs[job["id"]] = job
+        _active[key] = job["id"]
+        while len(_jobs) > JOB_HISTORY_SIZE:
+            oldest_id = next(iter(_jobs))
+            if oldest_id in _active.values():
+                break
+            _jobs.popitem(last=False)
+        return _snapshot(job), True
+
+
+# The insert waits for a concurrent submit of the same key and then does
+# nothing, so the second submit reads the first one's job instead. The loop
+# covers an active job that finishes between the insert and the select.
+def _submit_shared(conn, key):
+    cur = conn.cursor()
+    try:
+        while True:
+            now = time.time()
+            cur.execute(
+                EXPIRE_STALE_JOBS_SQL,
+                {"key": key, "now": now, "stale_before": now - JOB_STALE_AFTER},
+            )
+            cur.execute(INSERT_JOB_SQL, {"id": uuid4().hex, "key": key, "now": now})
+            job = _row_to_job(cur.fetchone())
+            created = job is not None
+            if created:
+                cur.execute(TRIM_JOBS_SQL, {"key": key, "keep": JOB_HISTORY_SIZE})
+            else:
+                cur.execute(ACTIVE_JOB_SQL, (key,))
+                job = _row_to_job(cur.fetchone())
+            if job is not None:
+                job = _shared_snapshot(cur, job)
+                conn.commit()
+                return job, created
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+# Single-flight submit: while a job with the same key is queued or running,
+# its record is returned instead of starting duplicate work.
+def submit_job(key, func):
+    with pooled_connection() as conn:
+        shared = _table_exists(conn)
+        conn.rollback()
+        if shared:
+            job, created = _submit_shared(conn, key)
+    if not shared:
+        job, created = _submit_local(key)
+
+    if created:
+        if shared:
+            with _lock:
+                _owned.add(job["id"])
+        _get_executor().submit(_run_job, job["id"], key, func, shared)
+    return job, created
+
+
+# Progress and heartbeat writes of a running job. A failed write is logged
+# and does not stop the job.
+def _update_shared(job_id, **fields):
+    fields["heartbeat_at"] = time.time()
+    for name in ("progress", "result"):
+        if name in fields:
+            fields[name] = _json(fields[name])
+    assignments = ", ".join(f"{name} = %({name})s" for name in fields)
+    try:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    f"UPDATE background_job SET {assignments} WHERE id = %(job_id)s",
+                    {**fields, "job_id": job_id},
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+    except psycopg2.Error as exc:
+        logger.warning("Updating job %s failed: %s", job_id, exc)
+
+
+def _heartbeat(job_id, stopped):
+    while not stopped.wait(JOB_HEARTBEAT_INTERVAL):
+        _update_shared(job_id)
+
+
+def _update_job(job_id, shared, **fields):
+    if shared:
+        _update_shared(job_id, **fields)
+        return
+    with _lock:
+        _jobs[job_id].update(fields)
+
+
+def _run_job(job_id, key, func, shared):
+    _update_job(job_id, shared, status="running", started_at=time.time())
+    started = time.monotonic()
+    stopped = threading.Event()
+    if shared:
+        threading.Thread(
+            target=_heartbeat,
+            args=(job_id, stopped),
+            name=f"job-heartbeat-{job_id[:8]}",
+            daemon=True,
+        ).start()
+    try:
+        result = func(lambda **progress: _update_job(job_id, shared, progress=progress))
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed.", job_id, key)
+        fields = {"status": "failed", "error": str(exc)}
+        if not shared:
+            with _lock:
+                _last_errors[key] = {"job_id": job_id, "error": str(exc), "at": time.time()}
+    else:
+        fields = {"status": "succeeded", "result": result}
+    finally:
+        stopped.set()
+    fields["finished_at"] = time.time()
+    fields["duration"] = round(time.monotonic() - started, 3)
+    _update_job(job_id, shared, **fields)
+    with _lock:
+        _owned.discard(job_id)
+        if _active.get(key) == job_id:
+            _active.pop(key)
+
+
+def get_job(job_id):
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            if _table_exists(conn):
+                cur.execute(GET_JOB_SQL, (job_id,))
+                job = _row_to_job(cur.fetchone())
+                return _shared_snapshot(cur, job) if job else None
+        finally:
+            cur.close()
+            conn.rollback()
+    with _lock:
+        job = _jobs.get(job_id)
+        return _snapshot(job) if job else None
+
+
+def latest_job(key):
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            if _table_exists(conn):
+                cur.execute(LATEST_JOB_SQL, (key,))
+                job = _row_to_job(cur.fetchone())
+                return _shared_snapshot(cur, job) if job else None
+        finally:
+            cur.close()
+            conn.rollback()
+    with _lock:
+        for job in reversed(_jobs.values()):
+            if job["key"] == key:
+                return _snapshot(job)
+    return None
@@ -0,0 +1,97 @@
+import dataclasses
+import logging
+from datetime import date
+from decimal import Decimal
+from os import environ as env
+from uuid import UUID
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson writes these natively; datetimes go through default() to keep
+# Flask's HTTP date format.
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson is not None else 0
+)
+_COMPACT = (",", ":")
+
+
+# NUMERIC columns (lon, lat) arrive from psycopg as Decimal and are written as
+# JSON numbers, so rows can be serialised as fetched, without a copy. The
+# other types are handled as in Flask's default provider.
+def _json_default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# JSON provider backed by orjson when it is installed (JSON_ENCODER=stdlib
+# forces the json module). Output differs from the stdlib only in whitespace,
+# in writing non-ASCII text as UTF-8 instead of \u escapes, and in writing
+# NaN and infinite floats as null where the stdlib writes NaN and Infinity.
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_json_default)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and env.get("JSON_ENCODER", "orjson") != "stdlib"
+        if orjson is None and env.get("JSON_ENCODER") == "orjson":
+            logger.warning("JSON_ENCODER=orjson but orjson is not installed; using json.")
+
+    def _orjson_options(self, indent=None):
+        options = _ORJSON_OPTIONS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    # orjson only knows compact output and two-space indentation; any other
+    # json.dumps argument falls back to the stdlib.
+    def _orjson_compatible(self, kwargs):
+        return (
+            self.use_orjson
+            and set(kwargs) <= {"indent", "separators"}
+            and kwargs.get("indent") in (None, 2)
+            and kwargs.get("separators") in (None, _COMPACT)
+        )
+
+    def dumps_bytes(self, obj, **kwargs):
+        if self._orjson_compatible(kwargs):
+            return orjson.dumps(
+                obj, default=self.default, option=self._orjson_options(kwargs.get("indent"))
+            )
+        return self.dumps(obj, **kwargs).encode("utf-8")
+
+    def dumps(self, obj, **kwargs):
+        if self._orjson_compatible(kwargs):
+            return self.dumps_bytes(obj, **kwargs).decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = self.dumps_bytes(obj, indent=2)
+        else:
+            body = self.dumps_bytes(obj, separators=_COMPACT)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
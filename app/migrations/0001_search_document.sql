@@ -0,0 +1,91 @@
+-- Maintained search document per zdenac, backing the global `search` filter.
+-- search_doc holds the lowercased text of every searchable column (including
+-- the district name) and search_doc_folded the same text with Croatian
+-- diacritics folded to ASCII; both carry trigram GIN indexes so
+-- `LIKE '%term%'` no longer needs a sequential scan.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION public.zdenci_search_fold(value text)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+    SELECT translate(lower(value), 'ČĆŠŽĐčćšžđ', 'ccszdccszd')
+$$;
+
+ALTER TABLE public.zdenac
+    ADD COLUMN IF NOT EXISTS search_doc text,
+    ADD COLUMN IF NOT EXISTS search_doc_folded text;
+
+CREATE OR REPLACE FUNCTION public.zdenac_search_doc_refresh()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    gc_name text;
+BEGIN
+    SELECT g.naziv_gc INTO gc_name
+    FROM public.gradska_cetvrt g
+    WHERE g.id = NEW.naziv_gc_id;
+
+    NEW.search_doc := lower(concat_ws(
+        E'\x1f',
+        NEW.lokacija,
+        gc_name,
+        NEW.tip_zdenca,
+        NEW.status_odrz,
+        NEW.aktivan_da_ne,
+        NEW.teren_dane,
+        NEW.vlasnik_ki,
+        NEW.odrzava_ki,
+        NEW.zkc_oznaka,
+        NEW.broj_vodomjera,
+        NEW.napomena_teren,
+        NEW.pozicija_tocnost,
+        NEW.lon::text,
+        NEW.lat::text
+    ));
+    NEW.search_doc_folded := public.zdenci_search_fold(NEW.search_doc);
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS zdenac_search_doc_refresh ON public.zdenac;
+CREATE TRIGGER zdenac_search_doc_refresh
+    BEFORE INSERT OR UPDATE OF
+        lokacija, tip_zdenca, status_odrz, aktivan_da_ne, teren_dane,
+        vlasnik_ki, odrzava_ki, zkc_oznaka, broj_vodomjera, napomena_teren,
+        pozicija_tocnost, lon, lat, naziv_gc_id
+    ON public.zdenac
+    FOR EACH ROW
+    EXECUTE FUNCTION public.zdenac_search_doc_refresh();
+
+-- Renaming a district rewrites the documents of its zdenci.
+CREATE OR REPLACE FUNCTION public.gradska_cetvrt_search_doc_refresh()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE public.zdenac
+    SET naziv_gc_id = naziv_gc_id
+    WHERE naziv_gc_id = NEW.id;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS gradska_cetvrt_search_doc_refresh ON public.gradska_cetvrt;
+CREATE TRIGGER gradska_cetvrt_search_doc_refresh
+    AFTER UPDATE OF naziv_gc
+    ON public.gradska_cetvrt
+    FOR EACH ROW
+    WHEN (OLD.naziv_gc IS DISTINCT FROM NEW.naziv_gc)
+    EXECUTE FUNCTION public.gradska_cetvrt_search_doc_refresh();
+
+UPDATE public.zdenac SET naziv_gc_id = naziv_gc_id;
+
+CREATE INDEX IF NOT EXISTS zdenac_search_doc_trgm_idx
+    ON public.zdenac USING gin (search_doc public.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS zdenac_search_doc_folded_trgm_idx
+    ON public.zdenac USING gin (search_doc_folded public.gin_trgm_ops);
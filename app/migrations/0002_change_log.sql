@@ -0,0 +1,72 @@
+-- Change log feeding incremental snapshot regeneration. Every write to
+-- zdenac (or to a district name) records the affected naziv_gc groups; the
+-- snapshot refresh consumes the log and rebuilds only those groups.
+-- naziv_gc IS NULL stands for zdenci without a district ("Nepoznato").
+
+CREATE TABLE IF NOT EXISTS public.zdenac_change_log (
+    id bigserial PRIMARY KEY,
+    naziv_gc text,
+    changed_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION public.zdenac_log_change()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO public.zdenac_change_log (naziv_gc)
+        SELECT DISTINCT g.naziv_gc
+        FROM new_rows n
+        LEFT JOIN public.gradska_cetvrt g ON g.id = n.naziv_gc_id;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO public.zdenac_change_log (naziv_gc)
+        SELECT DISTINCT g.naziv_gc
+        FROM old_rows o
+        LEFT JOIN public.gradska_cetvrt g ON g.id = o.naziv_gc_id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS zdenac_log_insert ON public.zdenac;
+CREATE TRIGGER zdenac_log_insert
+    AFTER INSERT ON public.zdenac
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.zdenac_log_change();
+
+DROP TRIGGER IF EXISTS zdenac_log_update ON public.zdenac;
+CREATE TRIGGER zdenac_log_update
+    AFTER UPDATE ON public.zdenac
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.zdenac_log_change();
+
+DROP TRIGGER IF EXISTS zdenac_log_delete ON public.zdenac;
+CREATE TRIGGER zdenac_log_delete
+    AFTER DELETE ON public.zdenac
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.zdenac_log_change();
+
+-- Renamed or deleted districts: the old group disappears from the snapshots.
+CREATE OR REPLACE FUNCTION public.gradska_cetvrt_log_change()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO public.zdenac_change_log (naziv_gc) VALUES (OLD.naziv_gc);
+    IF TG_OP = 'UPDATE' THEN
+        INSERT INTO public.zdenac_change_log (naziv_gc) VALUES (NEW.naziv_gc);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS gradska_cetvrt_log_change ON public.gradska_cetvrt;
+CREATE TRIGGER gradska_cetvrt_log_change
+    AFTER UPDATE OF naziv_gc OR DELETE ON public.gradska_cetvrt
+    FOR EACH ROW
+    EXECUTE FUNCTION public.gradska_cetvrt_log_change();
@@ -0,0 +1,112 @@
+-- Incrementally maintained counters behind /api/v1/stats/*. zdenac_stats
+-- holds one row per combination of district, status, type, active flag and
+-- coordinate presence; statement-level triggers apply the +/- deltas of
+-- every write, so reads aggregate over groups instead of zdenac rows.
+-- NULL is a regular group value (NULLS NOT DISTINCT, PostgreSQL 15+).
+
+CREATE TABLE IF NOT EXISTS public.zdenac_stats (
+    naziv_gc_id integer,
+    status_odrz text,
+    tip_zdenca text,
+    aktivan_da_ne text,
+    has_coordinates boolean NOT NULL,
+    total bigint NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS zdenac_stats_group_idx
+    ON public.zdenac_stats (naziv_gc_id, status_odrz, tip_zdenca, aktivan_da_ne, has_coordinates)
+    NULLS NOT DISTINCT;
+
+-- The +count deltas of new_rows and the -count deltas of old_rows are summed
+-- per group and applied in one upsert in group order, so concurrent writers
+-- lock counter rows in the same sequence; an UPDATE that moves no row between
+-- groups touches no counter at all. Only groups that lost rows can reach zero,
+-- so only those are checked for deletion.
+CREATE OR REPLACE FUNCTION public.zdenac_stats_apply()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    added public.zdenac_stats[] := '{}';
+    removed public.zdenac_stats[] := '{}';
+BEGIN
+    -- A transition table can only be referenced by the triggers that have it.
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT COALESCE(array_agg(g), '{}') INTO added
+        FROM (
+            SELECT naziv_gc_id, status_odrz, tip_zdenca, aktivan_da_ne,
+                   lon IS NOT NULL AND lat IS NOT NULL, COUNT(*)
+            FROM new_rows
+            GROUP BY 1, 2, 3, 4, 5
+        ) AS g (naziv_gc_id, status_odrz, tip_zdenca, aktivan_da_ne, has_coordinates, total);
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT COALESCE(array_agg(g), '{}') INTO removed
+        FROM (
+            SELECT naziv_gc_id, status_odrz, tip_zdenca, aktivan_da_ne,
+                   lon IS NOT NULL AND lat IS NOT NULL, -COUNT(*)
+            FROM old_rows
+            GROUP BY 1, 2, 3, 4, 5
+        ) AS g (naziv_gc_id, status_odrz, tip_zdenca, aktivan_da_ne, has_coordinates, total);
+    END IF;
+
+    INSERT INTO public.zdenac_stats AS s
+        (naziv_gc_id, status_odrz, tip_zdenca, aktivan_da_ne, has_coordinates, total)
+    SELECT naziv_gc_id, status_odrz, tip_zdenca, aktivan_da_ne, has_coordinates, SUM(total)
+    FROM (
+        SELECT * FROM unnest(added)
+        UNION ALL
+        SELECT * FROM unnest(removed)
+    ) AS deltas
+    GROUP BY 1, 2, 3, 4, 5
+    HAVING SUM(total) <> 0
+    ORDER BY 1, 2, 3, 4, 5
+    ON CONFLICT (naziv_gc_id, status_odrz, tip_zdenca, aktivan_da_ne, has_coordinates)
+    DO UPDATE SET total = s.total + EXCLUDED.total;
+
+    IF cardinality(removed) > 0 THEN
+        DELETE FROM public.zdenac_stats AS s
+        USING unnest(removed) AS r
+        WHERE s.total <= 0
+          AND s.naziv_gc_id IS NOT DISTINCT FROM r.naziv_gc_id
+          AND s.status_odrz IS NOT DISTINCT FROM r.status_odrz
+          AND s.tip_zdenca IS NOT DISTINCT FROM r.tip_zdenca
+          AND s.aktivan_da_ne IS NOT DISTINCT FROM r.aktivan_da_ne
+          AND s.has_coordinates = r.has_coordinates;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS zdenac_stats_insert ON public.zdenac;
+CREATE TRIGGER zdenac_stats_insert
+    AFTER INSERT ON public.zdenac
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.zdenac_stats_apply();
+
+DROP TRIGGER IF EXISTS zdenac_stats_update ON public.zdenac;
+CREATE TRIGGER zdenac_stats_update
+    AFTER UPDATE ON public.zdenac
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.zdenac_stats_apply();
+
+DROP TRIGGER IF EXISTS zdenac_stats_delete ON public.zdenac;
+CREATE TRIGGER zdenac_stats_delete
+    AFTER DELETE ON public.zdenac
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.zdenac_stats_apply();
+
+-- Recount from scratch; writes wait for the lock, so no delta is lost.
+BEGIN;
+LOCK TABLE public.zdenac IN SHARE MODE;
+DELETE FROM public.zdenac_stats;
+INSERT INTO public.zdenac_stats
+    (naziv_gc_id, status_odrz, tip_zdenca, aktivan_da_ne, has_coordinates, total)
+SELECT naziv_gc_id, status_odrz, tip_zdenca, aktivan_da_ne,
+       lon IS NOT NULL AND lat IS NOT NULL, COUNT(*)
+FROM public.zdenac
+GROUP BY 1, 2, 3, 4, 5;
+COMMIT;
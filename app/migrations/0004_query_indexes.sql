@@ -0,0 +1,26 @@
+-- Indexes for the predicates and orderings the query builders emit.
+-- REST filters compare LOWER(z.status_odrz) and LOWER(z.aktivan_da_ne), so
+-- those are expression indexes; every REST list is ordered by z.id, which is
+-- the second column so a filtered page is read in order and stops at LIMIT.
+-- zdenac_naziv_gc_id_idx also covers the foreign key (district deletes and
+-- renames no longer scan zdenac) and zdenac_lokacija_idx serves the default
+-- DataTables ordering.
+--
+-- lon/lat get no index: the only coordinate predicate is
+-- `lon IS NOT NULL AND lat IS NOT NULL`, which nearly every row passes, so the
+-- id-ordered coordinate list reads zdenac_pkey, and bbox/radius/nearest
+-- queries run on the in-memory spatial index.
+
+CREATE INDEX IF NOT EXISTS zdenac_naziv_gc_id_idx
+    ON public.zdenac (naziv_gc_id, id);
+
+CREATE INDEX IF NOT EXISTS zdenac_status_odrz_lower_idx
+    ON public.zdenac (lower(status_odrz), id);
+
+CREATE INDEX IF NOT EXISTS zdenac_aktivan_da_ne_lower_idx
+    ON public.zdenac (lower(aktivan_da_ne), id);
+
+CREATE INDEX IF NOT EXISTS zdenac_lokacija_idx
+    ON public.zdenac (lokacija, id);
+
+ANALYZE public.zdenac;
@@ -0,0 +1,28 @@
+-- Shared state of background jobs (snapshot refresh), so any worker process
+-- can report a job another one started. The partial unique index lets only
+-- one queued or running job exist per key across processes. Times are Unix
+-- timestamps, as in the job API responses; heartbeat_at is refreshed with
+-- every progress report and every JOB_HEARTBEAT_INTERVAL seconds while the job
+-- runs, and an active job whose heartbeat is older than JOB_STALE_AFTER
+-- seconds (its process died) is marked failed when the key is submitted again.
+
+CREATE TABLE IF NOT EXISTS public.background_job (
+    id text PRIMARY KEY,
+    key text NOT NULL,
+    status text NOT NULL,
+    progress jsonb,
+    result jsonb,
+    error text,
+    created_at double precision NOT NULL,
+    started_at double precision,
+    finished_at double precision,
+    duration double precision,
+    heartbeat_at double precision NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS background_job_active_idx
+    ON public.background_job (key)
+    WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS background_job_key_created_idx
+    ON public.background_job (key, created_at);
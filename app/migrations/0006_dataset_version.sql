@@ -0,0 +1,38 @@
+-- Dataset version behind ETags, cache keys and the spatial index. Every
+-- statement that writes zdenac or gradska_cetvrt bumps it, whichever process
+-- runs it (API workers, the import CLI, psql), and the new value becomes
+-- visible with the writing transaction. The first version is the creation
+-- time in milliseconds, so a recreated database does not reuse old versions.
+
+CREATE TABLE IF NOT EXISTS public.dataset_version (
+    id boolean PRIMARY KEY DEFAULT true CHECK (id),
+    version bigint NOT NULL,
+    changed_at double precision NOT NULL
+);
+
+INSERT INTO public.dataset_version (id, version, changed_at)
+VALUES (true, (extract(epoch FROM now()) * 1000)::bigint, extract(epoch FROM now()))
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION public.dataset_version_bump()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE public.dataset_version
+    SET version = version + 1, changed_at = extract(epoch FROM clock_timestamp());
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS dataset_version_zdenac ON public.zdenac;
+CREATE TRIGGER dataset_version_zdenac
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.zdenac
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.dataset_version_bump();
+
+DROP TRIGGER IF EXISTS dataset_version_gradska_cetvrt ON public.gradska_cetvrt;
+CREATE TRIGGER dataset_version_gradska_cetvrt
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.gradska_cetvrt
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.dataset_version_bump();
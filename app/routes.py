@@ -1,7 +1,27 @@
 from .blueprint import main
 from .api.datatable_api import api_zdenci, api_zdenci_export
+from .api.import_api import api_v1_zdenci_import
+from .api.health_api import api_v1_health_live, api_v1_health_ready
+from .api.spatial_api import (
+    api_v1_tiles,
+    api_v1_zdenci_bbox,
+    api_v1_zdenci_nearest,
+    api_v1_zdenci_radius,
+)
+from .api.stats_api import (
+    api_v1_stats_coordinates,
+    api_v1_stats_districts,
+    api_v1_stats_statuses,
+    api_v1_stats_types,
+)
+from .api.snapshot_api import (
+    api_v1_snapshots_job,
+    api_v1_snapshots_refresh,
+    api_v1_snapshots_status,
+)
 from .api.rest_api import (
     api_v1_gradske_cetvrti,
+    api_v1_zdenci_bulk,
     api_v1_zdenci_create,
     api_v1_zdenci_delete,
     api_v1_zdenci_get,
@@ -10,7 +30,7 @@ from .api.rest_api import (
     api_v1_zdenci_statusi,
     api_v1_zdenci_update,
 )
-from .web.web_routes import datatable, docs, index, openapi_spec
+from .web.web_routes import context_jsonld, datatable, docs, index, openapi_spec
 
 __all__ = [
     "main",
@@ -23,13 +43,37 @@ __all__ = [
 
     # REST API
     "api_v1_gradske_cetvrti",
+    "api_v1_zdenci_bulk",
     "api_v1_zdenci_create",
     "api_v1_zdenci_delete",
     "api_v1_zdenci_get",
+    "api_v1_zdenci_import",
     "api_v1_zdenci_koordinate",
     "api_v1_zdenci_list",
     "api_v1_zdenci_statusi",
     "api_v1_zdenci_update",
+
+    # Health probes
+    "api_v1_health_live",
+    "api_v1_health_ready",
+
+    # Spatial queries
+    "api_v1_tiles",
+    "api_v1_zdenci_bbox",
+    "api_v1_zdenci_nearest",
+    "api_v1_zdenci_radius",
+
+    # Statistics
+    "api_v1_stats_coordinates",
+    "api_v1_stats_districts",
+    "api_v1_stats_statuses",
+    "api_v1_stats_types",
+
+    # Snapshot jobs
+    "api_v1_snapshots_job",
+    "api_v1_snapshots_refresh",
+    "api_v1_snapshots_status",
+    "context_jsonld",
     "docs",
     "openapi_spec",
 ]
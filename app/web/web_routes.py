@@ -1,8 +1,12 @@
 from pathlib import Path
 
-from flask import Response, render_template, send_file
+from flask import Response, json, render_template, request
 
 from ..blueprint import main
+from ..data.jsonld import JSONLD_CONTEXT, JSONLD_CONTEXT_URL
+from ..file_serving import serve_file
+
+JSONLD_CONTEXT_MAX_AGE = 86400
 
 OPENAPI_PATH = Path(__file__).resolve().parents[2] / "openapi.json"
 
@@ -19,7 +23,18 @@ def datatable():
 
 @main.route("/openapi.json")
 def openapi_spec():
-    return send_file(OPENAPI_PATH, mimetype="application/json")
+    return serve_file(OPENAPI_PATH, mimetype="application/json")
+
+
+# Shared JSON-LD context referenced by the Link header in shared context mode.
+@main.route(JSONLD_CONTEXT_URL)
+def context_jsonld():
+    body = json.dumps({"@context": JSONLD_CONTEXT}, indent=2) + "\n"
+    response = Response(body, mimetype="application/ld+json")
+    response.headers["Cache-Control"] = f"public, max-age={JSONLD_CONTEXT_MAX_AGE}"
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 @main.route("/docs")
@@ -0,0 +1,55 @@
+import multiprocessing
+from os import environ as env
+
+# Production entry point: gunicorn -c gunicorn.conf.py
+#
+# The app is imported once in the master (preload) and shared copy-on-write
+# by the workers. Database connections and job threads are created per worker
+# after fork, so the master never opens a connection.
+
+wsgi_app = env.get("GUNICORN_APP", "run:app")
+bind = env.get("GUNICORN_BIND", "0.0.0.0:3000")
+workers = int(env.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = env.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(env.get("GUNICORN_THREADS", 4))
+timeout = int(env.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(env.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(env.get("GUNICORN_KEEPALIVE", 5))
+max_requests = int(env.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(env.get("GUNICORN_MAX_REQUESTS_JITTER", 0))
+preload_app = env.get("GUNICORN_PRELOAD", "1") != "0"
+accesslog = env.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+# create_app would warm the pool in the master; warm each worker instead.
+_warm_workers = env.get("DB_POOL_WARM", "1") != "0"
+env["DB_POOL_WARM"] = "0"
+
+
+# Without the dataset_version migration (0006) and the shared Redis backend
+# every worker keeps its own dataset version: a write does not change the
+# other workers' ETags and reaches their caches only after CACHE_TTL.
+def when_ready(server):
+    if workers > 1 and not env.get("CACHE_REDIS_URL"):
+        server.log.warning(
+            "Running %s workers without CACHE_REDIS_URL; ETags and caches follow writes "
+            "from other processes only with migration 0006_dataset_version applied.",
+            workers,
+        )
+
+
+def post_fork(server, worker):
+    if _warm_workers:
+        from app.data.db import warm_pool_async
+
+        warm_pool_async()
+
+
+# Runs after the worker has stopped accepting requests (graceful stop,
+# HUP reload or max_requests recycling).
+def worker_exit(server, worker):
+    from app.data.db import close_pool
+    from app.jobs import shutdown_jobs
+
+    shutdown_jobs(wait=True)
+    close_pool()
@@ -0,0 +1,56 @@
+import gzip
+
+import pytest
+
+from app import compression
+from app.compression import choose_encoding, encode_body, iter_compress
+
+
+@pytest.fixture
+def brotli_available(monkeypatch):
+    monkeypatch.delenv("RESPONSE_COMPRESSION", raising=False)
+    if compression.brotli is None:
+        pytest.skip("brotli is not installed")
+
+
+@pytest.fixture
+def gzip_only(monkeypatch):
+    monkeypatch.delenv("RESPONSE_COMPRESSION", raising=False)
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+def test_no_header_or_identity_only(brotli_available):
+    assert choose_encoding(None) is None
+    assert choose_encoding("") is None
+    assert choose_encoding("identity") is None
+
+
+def test_brotli_wins_ties(brotli_available):
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("*") == "br"
+
+
+def test_quality_values(brotli_available):
+    assert choose_encoding("br;q=0.5, gzip") == "gzip"
+    assert choose_encoding("br;q=0, gzip;q=0") is None
+    assert choose_encoding("gzip;q=0, *") == "br"
+
+
+def test_without_brotli(gzip_only):
+    assert choose_encoding("br") is None
+    assert choose_encoding("br, gzip") == "gzip"
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setenv("RESPONSE_COMPRESSION", "0")
+    assert choose_encoding("gzip, br") is None
+
+
+def test_small_bodies_are_not_compressed(gzip_only):
+    assert encode_body(b"{}", "gzip") == (b"{}", None)
+
+
+def test_streamed_gzip_round_trip(gzip_only):
+    chunks = [b"zdenac,lokacija\n" * 1000, b"", b"kraj\n"]
+    data = b"".join(iter_compress(iter(chunks), "gzip", static=True))
+    assert gzip.decompress(data) == b"".join(chunks)
@@ -0,0 +1,62 @@
+from werkzeug.datastructures import MultiDict
+
+from app.api.datatable_api import plan_datatable, split_filtered_count
+
+
+def test_unfiltered_plan():
+    plan = plan_datatable(MultiDict({"draw": "3", "start": "20", "length": "10"}))
+    sql, params = plan["page"]
+    assert plan["draw"] == 3
+    assert plan["start"] == 20
+    assert plan["filtered"] is False
+    assert "filtered_count" not in sql
+    assert sql.endswith(" LIMIT %s OFFSET %s")
+    assert params == [10, 20]
+
+
+def test_filtered_plan_carries_window_count():
+    plan = plan_datatable(MultiDict({"start": "0", "length": "10", "search[value]": "Trg"}))
+    sql, params = plan["page"]
+    count_sql, count_params = plan["count"]
+    assert plan["filtered"] is True
+    assert "COUNT(*) OVER () AS filtered_count" in sql
+    assert params == ["%trg%", 10, 0]
+    assert count_sql.startswith("SELECT COUNT(*)")
+    assert count_params == ["%trg%"]
+
+
+def test_all_rows_plan_has_no_limit():
+    sql, params = plan_datatable(MultiDict({"length": "-1"}))["page"]
+    assert "LIMIT" not in sql
+    assert params == []
+
+
+def test_count_mode(monkeypatch):
+    monkeypatch.delenv("DATATABLE_COUNT_MODE", raising=False)
+    assert plan_datatable(MultiDict())["count_mode"] == "exact"
+    assert plan_datatable(MultiDict({"count": "estimated"}))["count_mode"] == "estimated"
+    monkeypatch.setenv("DATATABLE_COUNT_MODE", "estimated")
+    assert plan_datatable(MultiDict({"count": "bogus"}))["count_mode"] == "estimated"
+
+
+def test_split_unfiltered_uses_total():
+    plan = {"filtered": False, "start": 0}
+    rows = [(1, "a")]
+    assert split_filtered_count(plan, rows, ["id", "lokacija"], 186) == (rows, ["id", "lokacija"], 186)
+
+
+def test_split_strips_window_count():
+    plan = {"filtered": True, "start": 0}
+    rows = [(1, "a", 12), (2, "b", 12)]
+    assert split_filtered_count(plan, rows, ["id", "lokacija", "filtered_count"], 186) == (
+        [(1, "a"), (2, "b")],
+        ["id", "lokacija"],
+        12,
+    )
+
+
+def test_split_empty_pages():
+    cols = ["id", "filtered_count"]
+    assert split_filtered_count({"filtered": True, "start": 0}, [], cols, 186) == ([], cols, 0)
+    # Past the end of the filtered rows the count has to be queried.
+    assert split_filtered_count({"filtered": True, "start": 50}, [], cols, 186) == ([], cols, None)
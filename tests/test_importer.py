@@ -0,0 +1,103 @@
+import io
+import json
+
+import pytest
+
+from app.data.importer import (
+    ImportValidationError,
+    _coerce_record,
+    _csv_records,
+    _geojson_records,
+    _Validator,
+    guess_import_format,
+)
+
+DISTRICTS = {"trnje": 3, "gornji grad - medvescak": 1}
+
+
+def _validate(records):
+    validator = _Validator(records, DISTRICTS)
+    lines = list(validator)
+    return validator, lines
+
+
+def test_coerce_record():
+    row, errors = _coerce_record(
+        {"lokacija": "  Trg  ", "lon": "15.9", "naziv_gc_id": "", "napomena_teren": " "},
+        DISTRICTS,
+        set(DISTRICTS.values()),
+    )
+    assert errors == []
+    assert row == {"lokacija": "Trg", "lon": 15.9, "naziv_gc_id": None, "napomena_teren": None}
+
+
+def test_coerce_record_maps_district_names():
+    ids = set(DISTRICTS.values())
+    row, errors = _coerce_record({"lokacija": "A", "naziv_gc": "Trnje"}, DISTRICTS, ids)
+    assert errors == [] and row["naziv_gc_id"] == 3
+    row, errors = _coerce_record({"lokacija": "A", "naziv_gc_id": "99"}, DISTRICTS, ids)
+    assert errors == ["naziv_gc_id does not exist."]
+    row, errors = _coerce_record({"lokacija": "A", "naziv_gc": "Nigdje"}, DISTRICTS, ids)
+    assert errors == ["Unknown naziv_gc: Nigdje."]
+
+
+def test_coerce_record_errors():
+    row, errors = _coerce_record({"lat": "north", "boja": "plava"}, DISTRICTS, set())
+    assert "Unknown fields: boja." in errors
+    assert "lat must be a number." in errors
+    assert "lokacija is required." in errors
+
+
+def test_records_with_id_may_leave_out_lokacija():
+    row, errors = _coerce_record({"id": "7", "status_odrz": "u redu"}, DISTRICTS, set())
+    assert errors == []
+    assert row == {"id": 7, "status_odrz": "u redu"}
+    # A blank value would clear lokacija, which is never allowed.
+    row, errors = _coerce_record({"id": "7", "lokacija": " "}, DISTRICTS, set())
+    assert errors == ["lokacija is required."]
+
+
+def test_csv_header_is_checked():
+    with pytest.raises(ImportValidationError) as exc:
+        _csv_records(io.StringIO("lokacija,boja\nA,plava\n"))
+    assert exc.value.errors[0]["line"] == 1
+
+
+def test_validator_collects_errors_and_stops_output():
+    records = _csv_records(io.StringIO("id,lokacija,lat\n1,A,45.8\n2,,45.8\n1,B,x\n3,C,45.7\n"))
+    validator, lines = _validate(records)
+    assert validator.rows == 4
+    assert [error["line"] for error in validator.errors] == [3, 4]
+    assert validator.errors[1]["errors"] == ["lat must be a number.", "Duplicate id 1."]
+    assert len(lines) == 1
+
+
+# Each staged line ends with the record's position and the columns it
+# supplies, so records update only their own columns.
+def test_validator_records_supplied_columns():
+    collection = {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "id": 5, "properties": {"lokacija": "A"},
+             "geometry": {"type": "Point", "coordinates": [15.9, 45.8]}},
+            {"type": "Feature", "properties": {"lokacija": "B", "naziv_gc": "Trnje"}},
+        ],
+    }
+    validator, lines = _validate(_geojson_records(io.StringIO(json.dumps(collection))))
+    assert validator.errors == []
+    assert validator.max_id == 5
+    assert lines[0].endswith(',0,"{lokacija,lon,lat}"\n')
+    assert lines[1].endswith(',1,"{lokacija,naziv_gc_id}"\n')
+
+
+@pytest.mark.parametrize("document", ["{", "[]", '{"type": "Feature"}'])
+def test_invalid_geojson(document):
+    with pytest.raises(ImportValidationError):
+        _geojson_records(io.StringIO(document))
+
+
+def test_guess_import_format():
+    assert guess_import_format("zdenci.csv") == "csv"
+    assert guess_import_format("zdenci.geojson") == "geojson"
+    assert guess_import_format(content_type="application/geo+json") == "geojson"
+    assert guess_import_format("zdenci.txt") is None
@@ -0,0 +1,47 @@
+import hashlib
+
+from app.data import migrate
+from app.data.migrate import MIGRATIONS_DIR, list_migrations
+
+
+def test_repository_migrations_are_ordered_and_unique():
+    migrations = list_migrations()
+    versions = [migration["version"] for migration in migrations]
+    assert versions == sorted(versions)
+    assert len(set(versions)) == len(versions)
+    assert versions[0] == "0001"
+
+
+def test_list_migrations(tmp_path, monkeypatch):
+    (tmp_path / "0002_second.sql").write_text("SELECT 2;\n")
+    (tmp_path / "0001_first.sql").write_text("SELECT 1;\n")
+    (tmp_path / "notes.sql").write_text("-- not a migration\n")
+    (tmp_path / "0003_third.txt").write_text("SELECT 3;\n")
+    monkeypatch.setattr(migrate, "MIGRATIONS_DIR", tmp_path)
+
+    migrations = list_migrations()
+    assert [(m["version"], m["name"]) for m in migrations] == [("0001", "first"), ("0002", "second")]
+    assert migrations[0]["checksum"] == hashlib.sha256(b"SELECT 1;\n").hexdigest()
+    assert migrations[1]["path"] == tmp_path / "0002_second.sql"
+
+
+def test_checksum_follows_file_content(tmp_path, monkeypatch):
+    path = tmp_path / "0001_first.sql"
+    path.write_text("SELECT 1;\n")
+    monkeypatch.setattr(migrate, "MIGRATIONS_DIR", tmp_path)
+    before = list_migrations()[0]["checksum"]
+    path.write_text("SELECT 1;\n-- edited\n")
+    assert list_migrations()[0]["checksum"] != before
+
+
+def test_pending_migrations_skip_applied(tmp_path, monkeypatch):
+    for name in ("0001_first.sql", "0002_second.sql", "0003_third.sql"):
+        (tmp_path / name).write_text("SELECT 1;\n")
+    monkeypatch.setattr(migrate, "MIGRATIONS_DIR", tmp_path)
+    monkeypatch.setattr(migrate, "applied_migrations", lambda conn: {"0002": {}})
+
+    assert [m["version"] for m in migrate.pending_migrations(None)] == ["0001", "0003"]
+
+
+def test_migrations_dir_exists():
+    assert MIGRATIONS_DIR.is_dir()
@@ -0,0 +1,221 @@
+import threading
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from app.data import pool as pool_module
+from app.data.pool import ConnectionPool, PoolTimeout
+
+
+class FakeInfo:
+    def __init__(self):
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.executed.append(sql)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = 0
+        self.broken = False
+        self.rollbacks = 0
+        self.executed = []
+        self.info = FakeInfo()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeConnect:
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self):
+        conn = FakeConnection(len(self.opened) + 1)
+        self.opened.append(conn)
+        return conn
+
+
+# Monotonic clock the tests move forward by hand.
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def connect():
+    return FakeConnect()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(pool_module.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_pool_sizes_are_checked(connect):
+    with pytest.raises(ValueError):
+        ConnectionPool(connect, minconn=3, maxconn=2)
+
+
+def test_fill_opens_minconn(connect):
+    pool = ConnectionPool(connect, minconn=2, maxconn=4)
+    pool.fill()
+    assert len(connect.opened) == 2
+    assert pool.stats()["idle"] == 2
+
+
+def test_checkout_reuses_returned_connection(connect):
+    pool = ConnectionPool(connect, minconn=0, maxconn=2)
+    conn = pool.getconn()
+    assert pool.stats()["in_use"] == 1
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+    assert len(connect.opened) == 1
+    stats = pool.stats()
+    assert (stats["size"], stats["in_use"], stats["checkouts"]) == (1, 1, 2)
+
+
+def test_timeout_when_exhausted(connect):
+    pool = ConnectionPool(connect, minconn=0, maxconn=1, timeout=0.05)
+    pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    stats = pool.stats()
+    assert (stats["exhausted"], stats["timeouts"]) == (1, 1)
+
+
+def test_waiter_gets_returned_connection(connect):
+    pool = ConnectionPool(connect, minconn=0, maxconn=1, timeout=5)
+    conn = pool.getconn()
+    timer = threading.Timer(0.05, pool.putconn, (conn,))
+    timer.start()
+    try:
+        assert pool.getconn() is conn
+    finally:
+        timer.join()
+    assert pool.stats()["exhausted"] == 1
+
+
+def test_no_ping_within_health_check_interval(connect, clock):
+    pool = ConnectionPool(connect, minconn=0, maxconn=1, health_check_interval=30)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    clock.now += 10
+    assert pool.getconn() is conn
+    assert conn.executed == []
+
+
+def test_ping_after_health_check_interval(connect, clock):
+    pool = ConnectionPool(connect, minconn=0, maxconn=1, health_check_interval=30)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    clock.now += 31
+    assert pool.getconn() is conn
+    assert conn.executed == ["SELECT 1"]
+
+
+def test_failed_ping_reconnects(connect, clock):
+    pool = ConnectionPool(connect, minconn=0, maxconn=1, health_check_interval=30)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.broken = True
+    clock.now += 31
+    replacement = pool.getconn()
+    assert replacement is not conn
+    assert conn.closed
+    stats = pool.stats()
+    assert (stats["size"], stats["reconnects"]) == (1, 1)
+
+
+def test_closed_connection_is_discarded(connect):
+    pool = ConnectionPool(connect, minconn=0, maxconn=1)
+    conn = pool.getconn()
+    conn.closed = 2
+    pool.putconn(conn)
+    stats = pool.stats()
+    assert (stats["size"], stats["idle"], stats["discarded"]) == (0, 0, 1)
+    assert pool.getconn() is not conn
+
+
+def test_unknown_transaction_status_is_discarded(connect):
+    pool = ConnectionPool(connect, minconn=0, maxconn=1)
+    conn = pool.getconn()
+    conn.info.transaction_status = extensions.TRANSACTION_STATUS_UNKNOWN
+    pool.putconn(conn)
+    assert conn.closed
+    assert pool.stats()["discarded"] == 1
+
+
+def test_open_transaction_is_rolled_back_on_return(connect):
+    pool = ConnectionPool(connect, minconn=0, maxconn=1)
+    conn = pool.getconn()
+    conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+    assert conn.rollbacks == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_failed_rollback_discards_connection(connect):
+    pool = ConnectionPool(connect, minconn=0, maxconn=1)
+    conn = pool.getconn()
+    conn.info.transaction_status = extensions.TRANSACTION_STATUS_INERROR
+    conn.broken = True
+    pool.putconn(conn)
+    assert conn.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_failed_connect_frees_the_slot(connect):
+    calls = []
+
+    def failing_connect():
+        calls.append(1)
+        raise psycopg2.OperationalError("could not connect")
+
+    pool = ConnectionPool(failing_connect, minconn=0, maxconn=1)
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn()
+    assert pool.stats()["size"] == 0
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn(timeout=0)
+    assert len(calls) == 2
+
+
+def test_closeall(connect):
+    pool = ConnectionPool(connect, minconn=2, maxconn=2)
+    pool.fill()
+    conn = pool.getconn()
+    pool.closeall()
+    assert all(opened.closed for opened in connect.opened if opened is not conn)
+    with pytest.raises(PoolError):
+        pool.getconn()
+    pool.putconn(conn)
+    assert conn.closed
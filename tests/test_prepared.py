@@ -0,0 +1,30 @@
+from app.data.prepared import _to_server_placeholders, compile_sql
+
+
+def test_placeholders_are_numbered_in_order():
+    sql, count = _to_server_placeholders("SELECT * FROM zdenac WHERE id > %s LIMIT %s OFFSET %s")
+    assert sql == "SELECT * FROM zdenac WHERE id > $1 LIMIT $2 OFFSET $3"
+    assert count == 3
+
+
+def test_escaped_percent_is_unescaped_and_not_counted():
+    sql, count = _to_server_placeholders("SELECT '100%%' WHERE lokacija LIKE %s")
+    assert sql == "SELECT '100%' WHERE lokacija LIKE $1"
+    assert count == 1
+
+
+def test_statement_without_placeholders():
+    assert _to_server_placeholders("SELECT 1") == ("SELECT 1", 0)
+
+
+def test_compile_sql_builds_each_shape_once():
+    calls = []
+
+    def build():
+        calls.append(1)
+        return "SELECT 1"
+
+    shape = ("test_compile_sql", object())
+    assert compile_sql(shape, build) == "SELECT 1"
+    assert compile_sql(shape, build) == "SELECT 1"
+    assert len(calls) == 1
@@ -0,0 +1,66 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from app.api.rest_api import (
+    KEYSET_MAX_LIMIT,
+    OFFSET_MAX_LIMIT,
+    _decode_cursor,
+    _encode_cursor,
+    _get_paging,
+    _split_keyset_page,
+    plan_zdenci_list,
+)
+
+
+def test_cursor_round_trip():
+    for last_id in (0, 1, 186, 2**31 - 1):
+        cursor = _encode_cursor(last_id)
+        assert "=" not in cursor
+        assert _decode_cursor(cursor) == last_id
+
+
+def test_cursor_is_url_safe():
+    cursor = _encode_cursor(10)
+    assert cursor == "eyJpZCI6MTB9"
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "e30", "eyJpZCI6ImEifQ", "WzFd"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        _decode_cursor(cursor)
+
+
+def test_paging_with_cursor():
+    limit, offset, after = _get_paging(MultiDict({"limit": "5", "after": _encode_cursor(10)}))
+    assert (limit, offset, after) == (5, 0, 10)
+
+
+def test_paging_rejects_offset_with_cursor():
+    with pytest.raises(ValueError):
+        _get_paging(MultiDict({"offset": "10", "after": _encode_cursor(10)}))
+
+
+def test_only_cursor_pages_have_the_larger_limit():
+    cursor = _encode_cursor(10)
+    assert _get_paging(MultiDict({"limit": str(KEYSET_MAX_LIMIT), "after": cursor}))[0] == KEYSET_MAX_LIMIT
+    assert _get_paging(MultiDict({"limit": str(OFFSET_MAX_LIMIT)}))[0] == OFFSET_MAX_LIMIT
+    for args in ({"limit": str(KEYSET_MAX_LIMIT)}, {"limit": str(OFFSET_MAX_LIMIT + 1), "offset": "1"}):
+        with pytest.raises(ValueError):
+            _get_paging(MultiDict(args))
+
+
+def test_split_keyset_page():
+    cols = ["id", "lokacija"]
+    rows = [(1, "a"), (2, "b"), (3, "c")]
+    assert _split_keyset_page(rows, cols, 3) == (rows, None)
+    page, cursor = _split_keyset_page(rows, cols, 2)
+    assert page == rows[:2]
+    assert _decode_cursor(cursor) == 2
+
+
+def test_keyset_plan_skips_count_and_filters_by_id():
+    plan = plan_zdenci_list(MultiDict({"limit": "5", "after": _encode_cursor(10)}))
+    sql, params = plan["page"]
+    assert plan["count"] is None
+    assert "z.id > %s" in sql
+    assert params == [10, 6, 0]
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from app.data.spatial import KDTree, haversine_m
+
+
+# Rows shaped like MAP_COLUMNS: (id, lokacija, lon, lat, naziv_gc).
+def _rows(count, seed=7):
+    generator = random.Random(seed)
+    return [
+        (index, f"zdenac {index}", generator.uniform(15.8, 16.2), generator.uniform(45.7, 45.9), None)
+        for index in range(1, count + 1)
+    ]
+
+
+@pytest.fixture(scope="module")
+def rows():
+    return _rows(500)
+
+
+@pytest.fixture(scope="module")
+def tree(rows):
+    return KDTree(rows)
+
+
+def test_bbox_matches_brute_force(rows, tree):
+    box = (15.9, 45.75, 16.05, 45.85)
+    expected = {
+        row[0] for row in rows if box[0] <= row[2] <= box[2] and box[1] <= row[3] <= box[3]
+    }
+    assert {row[0] for row in tree.bbox(*box)} == expected
+
+
+def test_within_matches_brute_force(rows, tree):
+    lon, lat, radius = 15.98, 45.81, 3000
+    expected = sorted(
+        (haversine_m(lon, lat, row[2], row[3]), row[0])
+        for row in rows
+        if haversine_m(lon, lat, row[2], row[3]) <= radius
+    )
+    found = tree.within(lon, lat, radius)
+    assert [(distance, row[0]) for distance, row in found] == expected
+
+
+def test_nearest_matches_brute_force(rows, tree):
+    for lon, lat in ((15.98, 45.81), (15.8, 45.7), (16.5, 46.0)):
+        expected = sorted((haversine_m(lon, lat, row[2], row[3]), row[0]) for row in rows)[:7]
+        found = tree.nearest(lon, lat, 7)
+        assert [(distance, row[0]) for distance, row in found] == expected
+
+
+def test_empty_tree():
+    tree = KDTree([])
+    assert len(tree) == 0
+    assert tree.bbox(-180, -90, 180, 90) == []
+    assert tree.within(16, 45.8, 1000) == []
+    assert tree.nearest(16, 45.8, 3) == []
+
+
+def test_nearest_with_k_larger_than_tree():
+    tree = KDTree(_rows(3))
+    assert len(tree.nearest(16, 45.8, 10)) == 3